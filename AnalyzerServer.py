@@ -0,0 +1,226 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import base64
+import concurrent.futures
+import io
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import typing
+from BuildCache import BuildCache
+from JackAST import BINARY_FORMATS
+from JackAnalyzer import analyze_file, analyze_paths, find_jack_files
+from JackAnalyzerClient import default_socket_path
+from SourcePositions import JackSyntaxError
+
+
+def analyze_source(source: str, scanner: str = "regex", indent: int = 0,
+                   output_format: str = "xml") -> typing.Union[str, bytes]:
+    """
+    Returns:
+        the output of analyzing the given Jack source, bytes for the
+        BINARY_FORMATS.
+    """
+    output = io.BytesIO() if output_format in BINARY_FORMATS else \
+        io.StringIO()
+    analyze_file(io.StringIO(source), output, scanner, indent, output_format)
+    return output.getvalue()
+
+
+def _set_output(response: dict, output: typing.Union[str, bytes]) -> None:
+    if type(output) is bytes:
+        response["output"] = base64.b64encode(output).decode("ascii")
+        response["encoding"] = "base64"
+    else:
+        response["output"] = output
+
+
+class AnalyzerServer:
+    """Serves analysis requests from a single long-running process, so that
+    interpreter startup, imports and the build cache are paid for once.
+
+    Requests and responses are JSON objects, one per line. A request holds
+    either "source", inline Jack source whose output is returned in
+    "output", or "path", a file or directory. A path is analyzed into the
+    files next to it if "write" is true, like JackAnalyzer does, and the
+    errors are returned in "errors". Otherwise it must be a file, and its
+    output is returned. "scanner", "indent" and "format" are the options of
+    JackAnalyzer, and "id" is copied into the response. Every response has
+    "ok", and "error" if the request itself failed. The output of the
+    BINARY_FORMATS is base64 encoded, with "encoding" set to "base64".
+    """
+
+    def __init__(self, jobs: int = 1,
+                 cache: typing.Optional[BuildCache] = None) -> None:
+        """
+        :param jobs: the number of worker processes, 1 analyzes in the
+            threads serving the clients.
+        :param cache: the build cache used for "write" requests, which is
+            evicted after each of them, as JackAnalyzer does after a run.
+        """
+        self.jobs = jobs
+        self.cache = cache
+        # held while the cache is evicted, requests finishing meanwhile
+        # do not evict it again
+        self._evicting = threading.Lock()
+        self.executor = None
+        if jobs > 1:
+            self.executor = concurrent.futures.ProcessPoolExecutor(jobs)
+
+    def handle(self, request: dict) -> dict:
+        """
+        Returns:
+            dict: the response to request.
+        """
+        response = {"id": request.get("id"), "ok": False}
+        try:
+            options = {
+                "scanner": request.get("scanner", "regex"),
+                "indent": int(request.get("indent", 0)),
+                "output_format": request.get("format", "xml"),
+            }
+            if "source" in request:
+                _set_output(response, self.analyze_source(
+                    request["source"], options))
+            elif request.get("write"):
+                errors = self.analyze_path(request["path"], options)
+                response["errors"] = errors
+                response["ok"] = not errors
+                return response
+            else:
+                with open(request["path"], 'r') as input_file:
+                    source = input_file.read()
+                _set_output(response, self.analyze_source(source, options))
+            response["ok"] = True
+        except Exception as error:
+            response["error"] = type(error).__name__ + ": " + str(error)
+        return response
+
+    def analyze_source(self, source: str,
+                       options: dict) -> typing.Union[str, bytes]:
+        try:
+            if self.executor is None:
+                return analyze_source(source, **options)
+            return self.executor.submit(analyze_source, source,
+                                        **options).result()
+        except JackSyntaxError as error:
+            # the workers and the stream scanner do not send the source
+            error.locate(source)
+            raise
+
+    def analyze_path(self, path: str, options: dict) -> typing.Dict[str, str]:
+        """Analyzes path into the files next to it.
+
+        Returns:
+            typing.Dict[str, str]: the error message of every failed file.
+        """
+        input_paths = find_jack_files(os.path.abspath(path))
+        results = analyze_paths(input_paths, self.jobs, self.executor,
+                                cache=self.cache, **options)
+        if self.cache is not None and self._evicting.acquire(blocking=False):
+            try:
+                self.cache.evict()
+            finally:
+                self._evicting.release()
+        return {input_path: result.error
+                for input_path, result in zip(input_paths, results)
+                if result.error is not None}
+
+    def handle_line(self, line: typing.Union[str, bytes]) -> str:
+        """
+        Returns:
+            str: the response line to a request line.
+        """
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request must be a JSON object")
+        except ValueError as error:
+            response = {"id": None, "ok": False,
+                        "error": "invalid request: " + str(error)}
+        else:
+            response = self.handle(request)
+        return json.dumps(response) + "\n"
+
+    def serve_stream(self, input_stream: typing.TextIO,
+                     output_stream: typing.TextIO) -> None:
+        """Answers the requests read from input_stream until it ends."""
+        for line in input_stream:
+            if line.strip():
+                output_stream.write(self.handle_line(line))
+                output_stream.flush()
+
+    def serve_socket(self, socket_path: str) -> None:
+        """Answers the requests of any number of concurrent clients on a Unix
+        socket, until interrupted.
+        """
+        analyzer = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                for line in self.rfile:
+                    if line.strip():
+                        self.wfile.write(analyzer.handle_line(line).encode())
+                        self.wfile.flush()
+
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        # the socket is created accessible to this user only, rather than
+        # made so after bind(), when other users could connect already
+        umask = os.umask(0o077)
+        try:
+            server = socketserver.ThreadingUnixStreamServer(socket_path,
+                                                            Handler)
+        finally:
+            os.umask(umask)
+        with server:
+            os.chmod(socket_path, 0o600)
+            server.daemon_threads = True
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.remove(socket_path)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+        if self.cache is not None:
+            self.cache.evict()
+
+
+if "__main__" == __name__:
+    parser = argparse.ArgumentParser(
+        prog="AnalyzerServer",
+        usage="AnalyzerServer [--socket PATH | --stdio] [options]")
+    parser.add_argument("--socket", default=default_socket_path(),
+                        help="the Unix socket to listen on")
+    parser.add_argument("--stdio", action="store_true",
+                        help="read requests from stdin and write responses "
+                             "to stdout instead")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes (default: 1)")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--cache-dir")
+    args = parser.parse_args()
+    # lets a plain kill clean up the socket and the worker processes
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server = AnalyzerServer(
+        args.jobs, None if args.no_cache else BuildCache(args.cache_dir))
+    try:
+        if args.stdio:
+            server.serve_stream(sys.stdin, sys.stdout)
+        else:
+            server.serve_socket(args.socket)
+    finally:
+        server.close()
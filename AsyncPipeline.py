@@ -0,0 +1,228 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import asyncio
+import concurrent.futures
+import io
+import os
+import typing
+from BuildCache import BuildCache
+from Instrumentation import Stats
+from JackAST import BINARY_FORMATS
+from JackAnalyzer import FileResult, analyze_file, output_path_of
+from MappedIO import SourceStream, read_source
+from SourcePositions import JackSyntaxError
+
+# Files read or written at the same time, on threads of their own.
+DEFAULT_IO_WORKERS = 4
+# Files waiting between two stages, per analyzing worker.
+QUEUED_PER_WORKER = 2
+
+
+def analyze_text(source: str, kinds: typing.Sequence[str],
+                 scanner: str = "regex", indent: int = 0, fold: bool = False,
+                 collect_stats: bool = False
+                 ) -> typing.Tuple[typing.Dict[str, typing.Union[str, bytes]],
+                                   typing.Optional[dict]]:
+    """Analyzes a source held in memory into every kind of output from a
+    single parse, as the analyzing workers of the pipeline do.
+
+    Args:
+        source (str): the Jack source.
+        kinds (typing.Sequence[str]): the output format first, then the
+            other outputs, see analyze_file.
+        scanner (str): the JackTokenizer engine to use.
+        indent (int): the number of spaces to indent the output by per level.
+        fold (bool): fold constants, see analyze_file.
+        collect_stats (bool): collect the Stats of the source.
+
+    Returns:
+        the output of every kind, and the Stats.to_dict() of the source if
+        collect_stats is true.
+    """
+    streams = {kind: io.BytesIO() if kind in BINARY_FORMATS else io.StringIO()
+               for kind in kinds}
+    stats = Stats() if collect_stats else None
+    analyze_file(SourceStream(source), streams[kinds[0]], scanner, indent,
+                 kinds[0], stats, fold,
+                 {kind: streams[kind] for kind in kinds[1:]})
+    return ({kind: stream.getvalue() for kind, stream in streams.items()},
+            stats.to_dict() if stats is not None else None)
+
+
+def _read(input_path: str, io_mode: str) -> str:
+    if io_mode == "mmap":
+        return read_source(input_path)
+    with open(input_path, 'r') as input_file:
+        return input_file.read()
+
+
+def _write(output_paths: typing.Dict[str, str],
+           outputs: typing.Dict[str, typing.Union[str, bytes]]) -> None:
+    for kind, output in outputs.items():
+        with open(output_paths[kind],
+                  'wb' if type(output) is bytes else 'w') as output_file:
+            output_file.write(output)
+
+
+def _remove(output_paths: typing.Dict[str, str]) -> None:
+    for output_path in output_paths.values():
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+
+async def analyze_pipeline(
+        input_paths: typing.List[str], jobs: int = 1,
+        io_workers: int = DEFAULT_IO_WORKERS,
+        queue_size: typing.Optional[int] = None,
+        executor: typing.Optional[concurrent.futures.Executor] = None,
+        scanner: str = "regex", cache: typing.Optional[BuildCache] = None,
+        indent: int = 0, output_format: str = "xml",
+        collect_stats: bool = False, fold: bool = False,
+        io_mode: str = "text",
+        outputs: typing.Sequence[str] = ()) -> typing.List[FileResult]:
+    """analyze_paths as three stages running at once: reading the files,
+    analyzing them on jobs workers and writing their outputs. The stages
+    are joined by queues of at most queue_size files, so that reading never
+    runs far ahead of the analysis and the analysis never far ahead of the
+    writing, and the time spent waiting on slow storage is hidden behind
+    the analysis of the files already read.
+
+    Args:
+        input_paths (typing.List[str]): the files to analyze.
+        jobs (int): the number of files analyzed at a time, on worker
+            processes if more than 1.
+        io_workers (int): the number of files read, and the number written,
+            at a time.
+        queue_size (int): the files waiting between two stages,
+            QUEUED_PER_WORKER per job by default.
+        executor (concurrent.futures.Executor): an existing pool of jobs
+            workers to analyze on, instead of starting a new one.
+        scanner, cache, indent, output_format, collect_stats, fold, io_mode,
+        outputs: see analyze_path.
+
+    Returns:
+        typing.List[FileResult]: the result of every input path, in the same
+        order.
+    """
+    loop = asyncio.get_running_loop()
+    kinds = [output_format] + [kind for kind in outputs
+                               if kind != output_format]
+    results = [FileResult()] * len(input_paths)
+    read_queue = asyncio.Queue(queue_size or QUEUED_PER_WORKER * jobs)
+    write_queue = asyncio.Queue(queue_size or QUEUED_PER_WORKER * jobs)
+    pending = iter(enumerate(input_paths))
+    cache_options = [scanner, str(indent)] + (["fold"] if fold else [])
+
+    def restore(input_path: str) -> typing.Optional[typing.Dict[str, str]]:
+        """
+        Returns:
+            the cache keys by kind, or None if every output was restored.
+        """
+        keys = cache.keys(input_path, kinds, *cache_options)
+        if all(cache.restore(keys[kind], output_path_of(input_path, kind))
+               for kind in kinds):
+            return None
+        return keys
+
+    async def read() -> None:
+        for index, input_path in pending:
+            keys = None
+            try:
+                if cache is not None:
+                    keys = await loop.run_in_executor(io_executor, restore,
+                                                      input_path)
+                    if keys is None:
+                        if collect_stats:
+                            stats = Stats()
+                            stats.files = stats.cache_hits = 1
+                            results[index] = FileResult(
+                                stats=stats.to_dict())
+                        continue
+                source = await loop.run_in_executor(io_executor, _read,
+                                                    input_path, io_mode)
+            except Exception as error:
+                await write_queue.put((index, keys, error))
+                continue
+            await read_queue.put((index, keys, source))
+
+    async def analyze() -> None:
+        while True:
+            item = await read_queue.get()
+            if item is None:
+                return
+            index, keys, source = item
+            try:
+                result = await loop.run_in_executor(
+                    analyze_executor, analyze_text, source, kinds, scanner,
+                    indent, fold, collect_stats)
+            except Exception as error:
+                if isinstance(error, JackSyntaxError):
+                    error.locate(source)
+                result = error
+            await write_queue.put((index, keys, result))
+
+    async def write() -> None:
+        while True:
+            item = await write_queue.get()
+            if item is None:
+                return
+            index, keys, result = item
+            input_path = input_paths[index]
+            output_paths = {kind: output_path_of(input_path, kind)
+                            for kind in kinds}
+            try:
+                if isinstance(result, Exception):
+                    raise result
+                written, stats = result
+                await loop.run_in_executor(io_executor, _write, output_paths,
+                                           written)
+                if keys is not None:
+                    for kind in kinds:
+                        await loop.run_in_executor(
+                            io_executor, cache.store, keys[kind],
+                            output_paths[kind])
+                results[index] = FileResult(stats=stats)
+            except Exception as error:
+                await loop.run_in_executor(io_executor, _remove, output_paths)
+                results[index] = FileResult(type(error).__name__ + ": " +
+                                            str(error))
+
+    async def stage(workers: typing.List[asyncio.Task],
+                    queue: asyncio.Queue, count: int) -> None:
+        """Waits for the workers of a stage, then ends the count workers of
+        the stage after it.
+        """
+        await asyncio.gather(*workers)
+        for _ in range(count):
+            await queue.put(None)
+
+    io_executor = concurrent.futures.ThreadPoolExecutor(io_workers)
+    # a single analyzing job runs on a thread, leaving the event loop free
+    # to read and write meanwhile
+    analyze_executor = executor
+    if analyze_executor is None:
+        analyze_executor = concurrent.futures.ProcessPoolExecutor(jobs) \
+            if jobs > 1 else concurrent.futures.ThreadPoolExecutor(1)
+    try:
+        readers = [asyncio.ensure_future(read()) for _ in range(io_workers)]
+        analyzers = [asyncio.ensure_future(analyze()) for _ in range(jobs)]
+        writers = [asyncio.ensure_future(write()) for _ in range(io_workers)]
+        await asyncio.gather(stage(readers, read_queue, jobs),
+                             stage(analyzers, write_queue, io_workers),
+                             *writers)
+    finally:
+        io_executor.shutdown()
+        if executor is None:
+            analyze_executor.shutdown()
+    return results
+
+
+def run_pipeline(input_paths: typing.List[str], jobs: int = 1,
+                 **options) -> typing.List[FileResult]:
+    """Runs analyze_pipeline to completion, see there."""
+    return asyncio.run(analyze_pipeline(input_paths, jobs, **options))
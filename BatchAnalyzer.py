@@ -0,0 +1,170 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import collections
+import concurrent.futures
+import io
+import itertools
+import os
+import typing
+from ConstantFolder import fold_constants
+from JackAST import BINARY_FORMATS, Node
+from JackAnalyzer import analyze_file, parse_tree
+from MappedIO import SourceStream
+from SourcePositions import JackSyntaxError
+
+# The output_format that returns the parse tree itself.
+TREE = "tree"
+# Sources sent to a worker at a time, and chunks in flight per worker
+# before analyze_many stops reading its input.
+DEFAULT_CHUNK_SIZE = 16
+PENDING_PER_WORKER = 2
+
+
+class SourceResult(typing.NamedTuple):
+    """The outcome of analyzing one in-memory source: its output, a str or
+    bytes in the requested format or a JackAST.Class for "tree", or the
+    error message if it failed.
+    """
+    name: str
+    output: typing.Union[str, bytes, Node, None] = None
+    error: typing.Optional[str] = None
+
+
+def analyze_source(name: str, source: str, scanner: str = "regex",
+                   indent: int = 0, output_format: str = "xml",
+                   fold: bool = False) -> SourceResult:
+    """Analyzes a source held in memory, without touching the filesystem.
+    Errors are caught, like analyze_path does.
+
+    Args:
+        name (str): identifies the source in the result.
+        source (str): the Jack source.
+        scanner (str): the JackTokenizer engine to use.
+        indent (int): the number of spaces to indent the output by per level.
+        output_format (str): one of JackAST.SERIALIZERS, or "tree" for the
+            parse tree.
+        fold (bool): fold constants, see analyze_file.
+
+    Returns:
+        SourceResult: the output or the error.
+    """
+    try:
+        if output_format == TREE:
+            tree = parse_tree(SourceStream(source), scanner)
+            if fold:
+                fold_constants(tree)
+            return SourceResult(name, tree)
+        output = io.BytesIO() if output_format in BINARY_FORMATS else \
+            io.StringIO()
+        analyze_file(SourceStream(source), output, scanner, indent,
+                     output_format, fold=fold)
+        return SourceResult(name, output.getvalue())
+    except Exception as error:
+        if isinstance(error, JackSyntaxError):
+            error.locate(source)
+        return SourceResult(name, error=type(error).__name__ + ": " +
+                            str(error))
+
+
+def _analyze_chunk(chunk: typing.List[typing.Tuple[str, str]],
+                   options: dict) -> typing.List[SourceResult]:
+    return [analyze_source(name, source, **options) for name, source in chunk]
+
+
+class AnalyzerPool:
+    """A pool of worker processes kept for any number of analyze_many()
+    batches, so that starting workers and importing the analyzer is paid
+    for once.
+    """
+
+    def __init__(self, jobs: typing.Optional[int] = None) -> None:
+        """
+        :param jobs: the number of worker processes, the number of CPUs by
+            default.
+        """
+        self.jobs = jobs or os.cpu_count() or 1
+        self.executor = concurrent.futures.ProcessPoolExecutor(self.jobs)
+
+    def __enter__(self) -> "AnalyzerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    def analyze_many(self, sources: typing.Iterable[typing.Tuple[str, str]],
+                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     max_pending: typing.Optional[int] = None,
+                     **options) -> typing.Iterator[SourceResult]:
+        """Analyzes (name, source) pairs on the workers, sending them in
+        chunks of chunk_size. At most max_pending chunks are in flight, by
+        default PENDING_PER_WORKER per worker, and sources is only read
+        further as their results are taken, so that a large or endless
+        batch is never held in memory whole.
+
+        Args:
+            sources: the (name, source) pairs to analyze.
+            chunk_size (int): sources per task sent to a worker.
+            max_pending (int): chunks submitted but not yet yielded.
+            options: keyword arguments passed on to analyze_source.
+
+        Returns:
+            typing.Iterator[SourceResult]: the results, in the order of
+            sources.
+        """
+        if max_pending is None:
+            max_pending = PENDING_PER_WORKER * self.jobs
+        pending = collections.deque()
+        sources = iter(sources)
+        try:
+            while True:
+                chunk = list(itertools.islice(sources, chunk_size))
+                if not chunk:
+                    break
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+                pending.append(self.executor.submit(_analyze_chunk, chunk,
+                                                    options))
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def analyze_many(sources: typing.Iterable[typing.Tuple[str, str]],
+                 jobs: int = 1,
+                 pool: typing.Optional[AnalyzerPool] = None,
+                 **options) -> typing.Iterator[SourceResult]:
+    """Analyzes many in-memory sources, without touching the filesystem.
+
+    Args:
+        sources: the (name, source) pairs to analyze.
+        jobs (int): the number of worker processes of a pool started for
+            this batch, 1 analyzes in this process. Ignored if pool is
+            given.
+        pool (AnalyzerPool): an existing pool to analyze on.
+        options: keyword arguments passed on to AnalyzerPool.analyze_many
+            and analyze_source.
+
+    Returns:
+        typing.Iterator[SourceResult]: the results, in the order of sources.
+    """
+    if pool is not None:
+        yield from pool.analyze_many(sources, **options)
+        return
+    if jobs <= 1:
+        options.pop("chunk_size", None)
+        options.pop("max_pending", None)
+        for name, source in sources:
+            yield analyze_source(name, source, **options)
+        return
+    with AnalyzerPool(jobs) as pool:
+        yield from pool.analyze_many(sources, **options)
@@ -0,0 +1,242 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import os
+import sys
+import typing
+from JackAST import NODE_TYPES, Node, Token, write_xml
+from XmlEmitter import XmlEmitter
+
+# A file is MAGIC, then varints: the format version, the content (CONTENTS)
+# and the number of entries of the token table, followed by the table and
+# the body.
+#
+# The token table holds every distinct token once, as the varint index of
+# its tag in TOKEN_TAGS, the varint length of its UTF-8 text and the text.
+#
+# The body is a list of varint codes. A token is TOKEN_BASE plus its index
+# in the table. In a parse tree, which is written in preorder, a node is
+# the index of its tag in NODE_TAGS followed by the number of its children.
+MAGIC = b"JKB\0"
+FORMAT_VERSION = 1
+CONTENTS = ("tree", "tokens")
+TOKEN_TAGS = ("keyword", "symbol", "integerConstant", "stringConstant",
+              "identifier")
+NODE_TAGS = tuple(NODE_TYPES)
+TOKEN_BASE = len(NODE_TAGS)
+TOKEN_TAG_CODES = {tag: code for code, tag in enumerate(TOKEN_TAGS)}
+NODE_CODES = {tag: code for code, tag in enumerate(NODE_TAGS)}
+
+
+def encode_varint(value: int, output: bytearray) -> None:
+    """Appends value, which is not negative, as a varint: 7 bits per byte,
+    lowest first, with the high bit set on all but the last byte.
+    """
+    while value >= 0x80:
+        output.append(value & 0x7F | 0x80)
+        value >>= 7
+    output.append(value)
+
+
+def decode_varints(data: typing.ByteString, pos: int = 0) -> typing.List[
+        int]:
+    """
+    Returns:
+        typing.List[int]: every varint in data from pos on.
+    """
+    values = []
+    append = values.append
+    value = shift = 0
+    for byte in memoryview(data)[pos:]:
+        if byte < 0x80:
+            append(value | byte << shift)
+            value = shift = 0
+        else:
+            value |= (byte & 0x7F) << shift
+            shift += 7
+    return values
+
+
+def _read_varint(data: typing.ByteString,
+                 pos: int) -> typing.Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class _Encoder:
+    """Collects the token table and the body of one file."""
+
+    def __init__(self) -> None:
+        self.token_codes = {}
+        self.table = bytearray()
+        self.body = bytearray()
+
+    def token(self, token: Token) -> None:
+        key = (token.tag, token.text)
+        code = self.token_codes.get(key)
+        if code is None:
+            code = self.token_codes[key] = TOKEN_BASE + len(self.token_codes)
+            text = token.text.encode()
+            encode_varint(TOKEN_TAG_CODES[token.tag], self.table)
+            encode_varint(len(text), self.table)
+            self.table += text
+        encode_varint(code, self.body)
+
+    def node(self, node: Node) -> None:
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if type(item) is Token:
+                self.token(item)
+                continue
+            encode_varint(NODE_CODES[item.tag], self.body)
+            encode_varint(len(item.children), self.body)
+            stack.extend(reversed(item.children))
+
+    def getvalue(self, content: str) -> bytes:
+        header = bytearray(MAGIC)
+        encode_varint(FORMAT_VERSION, header)
+        encode_varint(CONTENTS.index(content), header)
+        encode_varint(len(self.token_codes), header)
+        return bytes(header + self.table + self.body)
+
+
+def encode_tree(node: Node) -> bytes:
+    """
+    Returns:
+        bytes: the parse tree under node in the binary format.
+    """
+    encoder = _Encoder()
+    encoder.node(node)
+    return encoder.getvalue("tree")
+
+
+def encode_tokens(tokens: typing.Iterable[Token]) -> bytes:
+    """
+    Returns:
+        bytes: the token stream in the binary format.
+    """
+    encoder = _Encoder()
+    for token in tokens:
+        encoder.token(token)
+    return encoder.getvalue("tokens")
+
+
+def decode(data: typing.ByteString) -> typing.Union[Node, typing.List[Token]]:
+    """Loads a file of the binary format. Equal tokens are loaded as the
+    same Token object.
+
+    Returns:
+        the root of a parse tree, or the list of tokens of a token stream.
+
+    Raises:
+        ValueError: if data is not in the binary format, or in a version of
+        it this loader does not read.
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("not a binary Jack file")
+    version, pos = _read_varint(data, len(MAGIC))
+    if version != FORMAT_VERSION:
+        raise ValueError("unsupported binary Jack format version " +
+                         str(version))
+    content, pos = _read_varint(data, pos)
+    count, pos = _read_varint(data, pos)
+    tokens = []
+    for _ in range(count):
+        tag, pos = _read_varint(data, pos)
+        length, pos = _read_varint(data, pos)
+        text = bytes(data[pos:pos + length]).decode()
+        pos += length
+        tokens.append(Token(TOKEN_TAGS[tag], text))
+    codes = decode_varints(data, pos)
+    if CONTENTS[content] == "tokens":
+        return [tokens[code - TOKEN_BASE] for code in codes]
+    # indexed by code, with the node types before the tokens
+    table = [NODE_TYPES[tag] for tag in NODE_TAGS] + tokens
+    root = []
+    children, remaining = root, 1
+    parents = []
+    codes = iter(codes)
+    for code in codes:
+        if code >= TOKEN_BASE:
+            children.append(table[code])
+            remaining -= 1
+        else:
+            node = table[code]()
+            children.append(node)
+            parents.append((children, remaining - 1))
+            children, remaining = node.children, next(codes)
+        while not remaining and parents:
+            children, remaining = parents.pop()
+    return root[0]
+
+
+def load(path: str) -> typing.Union[Node, typing.List[Token]]:
+    """decode() of the file at path."""
+    with open(path, 'rb') as binary_file:
+        return decode(binary_file.read())
+
+
+def write_binary(node: Node, output_stream: typing.BinaryIO,
+                 indent: int = 0) -> None:
+    """Writes the tree in the binary format. output_stream must take bytes,
+    indent is ignored.
+    """
+    output_stream.write(encode_tree(node))
+
+
+def write_tokens_xml(tokens: typing.Iterable[Token],
+                     output_stream: typing.TextIO, indent: int = 0) -> None:
+    """Writes a token stream as the <tokens> XML of the nand2tetris
+    tokenizer tests.
+    """
+    emitter = XmlEmitter(output_stream, indent)
+    emitter.open("tokens")
+    for token in tokens:
+        emitter.terminal(token.tag, token.text)
+    emitter.close("tokens")
+    emitter.flush()
+
+
+def binary_to_xml(data: typing.ByteString, output_stream: typing.TextIO,
+                  indent: int = 0) -> None:
+    """Converts a file of the binary format back to the XML it stands
+    for.
+    """
+    loaded = decode(data)
+    if type(loaded) is list:
+        write_tokens_xml(loaded, output_stream, indent)
+    else:
+        write_xml(loaded, output_stream, indent)
+
+
+if "__main__" == __name__:
+    parser = argparse.ArgumentParser(
+        prog="BinaryFormat",
+        usage="BinaryFormat <binary file> [--indent N] [--output FILE]")
+    parser.add_argument("input_path")
+    parser.add_argument("--indent", type=int, default=0)
+    parser.add_argument("--output", help="the XML file to write, the input "
+                                         "path with an .xml extension by "
+                                         "default, - for stdout")
+    args = parser.parse_args()
+    output_path = args.output or os.path.splitext(args.input_path)[0] + \
+        ".xml"
+    with open(args.input_path, 'rb') as input_file:
+        data = input_file.read()
+    if output_path == "-":
+        binary_to_xml(data, sys.stdout, args.indent)
+    else:
+        with open(output_path, 'w') as output_file:
+            binary_to_xml(data, output_file, args.indent)
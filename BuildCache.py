@@ -0,0 +1,169 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import filecmp
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import typing
+
+HASH_BLOCK_SIZE = 1 << 20
+DEFAULT_MAX_BYTES = 512 << 20
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+
+
+def default_cache_dir() -> str:
+    """
+    Returns:
+        str: $XDG_CACHE_HOME/JackAnalyzer, or ~/.cache/JackAnalyzer.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or \
+        os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "JackAnalyzer")
+
+
+def analyzer_version() -> str:
+    """
+    Returns:
+        str: a hash of the analyzer's own source files, so that any change
+        to the analyzer invalidates everything cached by older versions.
+    """
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+        with open(path, 'rb') as module:
+            digest.update(module.read())
+    return digest.hexdigest()
+
+
+def content_digest(input_path: str) -> bytes:
+    """Hashes the content of a file, reading it in blocks.
+
+    Returns:
+        bytes: the SHA-256 digest of the file.
+    """
+    digest = hashlib.sha256()
+    with open(input_path, 'rb') as input_file:
+        for block in iter(lambda: input_file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+class BuildCache:
+    """An on-disk store of analyzer outputs, keyed by a hash of the input
+    content, the analyzer version and the options that affect the output.
+    Entries are plain files, their modification time is the last time they
+    were used.
+    """
+
+    def __init__(self, directory: typing.Optional[str] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age: float = DEFAULT_MAX_AGE) -> None:
+        """
+        :param directory: where entries are kept, default_cache_dir() if None.
+        :param max_bytes: the total size evict() trims the cache down to.
+        :param max_age: entries unused for this many seconds are evicted.
+        """
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.version = analyzer_version()
+
+    def key(self, input_path: str, *options: str) -> str:
+        """
+        Returns:
+            str: the cache key of analyzing input_path with options.
+        """
+        return self._derive(content_digest(input_path), options)
+
+    def keys(self, input_path: str, kinds: typing.Iterable[str],
+             *options: str) -> typing.Dict[str, str]:
+        """Hashes the input file once for the outputs of every kind.
+
+        Returns:
+            the cache key of analyzing input_path with options into each of
+            kinds, by kind.
+        """
+        content = content_digest(input_path)
+        return {kind: self._derive(content, options + (kind,))
+                for kind in kinds}
+
+    def _derive(self, content: bytes, options: typing.Sequence[str]) -> str:
+        digest = hashlib.sha256(self.version.encode())
+        for option in options:
+            digest.update(b"\0" + option.encode())
+        digest.update(b"\0" + content)
+        return digest.hexdigest()
+
+    def entry_path(self, key: str) -> str:
+        """The file holding the entry of key."""
+        return os.path.join(self.directory, key[:2], key)
+
+    def restore(self, key: str, output_path: str) -> bool:
+        """Puts the cached output for key at output_path. An output file that
+        already holds it is left in place.
+
+        Returns:
+            bool: True on a cache hit, False if key is not cached.
+        """
+        entry = self.entry_path(key)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            return False
+        if not (os.path.exists(output_path) and
+                filecmp.cmp(entry, output_path, shallow=False)):
+            shutil.copyfile(entry, output_path)
+        return True
+
+    def store(self, key: str, output_path: str) -> None:
+        """Caches the output file written for key."""
+        entry = self.entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # copy then rename, so that concurrent readers never see half an entry
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(entry))
+        os.close(handle)
+        try:
+            shutil.copyfile(output_path, temp_path)
+            os.replace(temp_path, entry)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def evict(self) -> int:
+        """Removes the entries older than max_age, then the least recently
+        used ones until the cache fits in max_bytes.
+
+        Returns:
+            int: the number of removed entries.
+        """
+        entries = []
+        for directory, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort(reverse=True)
+        oldest_allowed = time.time() - self.max_age
+        total = 0
+        removed = 0
+        for mtime, size, path in entries:
+            if mtime >= oldest_allowed and total + size <= self.max_bytes:
+                total += size
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
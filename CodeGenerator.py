@@ -0,0 +1,281 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from JackAST import (
+    ClassVarDec, Expression, Node, Statements, SubroutineDec, VarDec)
+from SymbolTable import SEGMENTS, SymbolTable
+from VMWriter import VMWriter
+
+BINARY_COMMANDS = {
+    "+": "add",
+    "-": "sub",
+    "&": "and",
+    "|": "or",
+    "<": "lt",
+    ">": "gt",
+    "=": "eq",
+}
+BINARY_CALLS = {
+    "*": "Math.multiply",
+    "/": "Math.divide",
+}
+UNARY_COMMANDS = {
+    "-": "neg",
+    "~": "not",
+    "^": "shiftleft",
+    "#": "shiftright",
+}
+STATEMENT_COMPILERS = {
+    "letStatement": "compile_let",
+    "ifStatement": "compile_if",
+    "whileStatement": "compile_while",
+    "doStatement": "compile_do",
+    "returnStatement": "compile_return",
+}
+
+
+class CodeGenerator:
+    """Gets a parse tree, as built by the CompilationEngine with a
+    JackAST.TreeBuilder, and writes its VM code through a VMWriter. The
+    compile_* methods follow those of the CompilationEngine, one per grammar
+    rule, walking the nodes the engine built for it.
+    """
+
+    def __init__(self, writer: VMWriter) -> None:
+        """
+        :param writer: receives the VM commands.
+        """
+        self.writer = writer
+        self.symbols = SymbolTable()
+        self.class_name = None
+        self.label_count = 0
+
+    def compile_class(self, node: Node) -> None:
+        """Compiles a complete class."""
+        self.symbols = SymbolTable()
+        self.class_name = node.children[1].text
+        for child in node.children:
+            if type(child) is ClassVarDec:
+                self.compile_class_var_dec(child)
+            elif type(child) is SubroutineDec:
+                self.compile_subroutine(child)
+
+    def compile_class_var_dec(self, node: Node) -> None:
+        """Defines the static or field variables of a declaration."""
+        self._define(node, node.children[0].text.upper())
+
+    def compile_subroutine(self, node: Node) -> None:
+        """Compiles a complete method, function, or constructor."""
+        children = node.children
+        kind = children[0].text
+        self.symbols.start_subroutine()
+        self.label_count = 0
+        if kind == "method":
+            self.symbols.define("this", self.class_name, "ARG")
+        self.compile_parameter_list(children[4])
+        # a body without statements may have no statements node
+        statements = None
+        for child in children[6].children:
+            if type(child) is VarDec:
+                self.compile_var_dec(child)
+            elif type(child) is Statements:
+                statements = child
+        self.writer.write_function(
+            self.class_name + "." + children[2].text,
+            self.symbols.var_count("VAR"))
+        if kind == "constructor":
+            self.writer.write_push("constant", self.symbols.var_count("FIELD"))
+            self.writer.write_call("Memory.alloc", 1)
+            self.writer.write_pop("pointer", 0)
+        elif kind == "method":
+            self.writer.write_push("argument", 0)
+            self.writer.write_pop("pointer", 0)
+        if statements is not None:
+            self.compile_statements(statements)
+
+    def compile_parameter_list(self, node: Node) -> None:
+        """Defines the parameters of a subroutine."""
+        children = node.children
+        for i in range(0, len(children), 3):
+            self.symbols.define(children[i + 1].text, children[i].text, "ARG")
+
+    def compile_var_dec(self, node: Node) -> None:
+        """Defines the local variables of a declaration."""
+        self._define(node, "VAR")
+
+    def _define(self, node: Node, kind: str) -> None:
+        children = node.children
+        var_type = children[1].text
+        for child in children[2::2]:
+            self.symbols.define(child.text, var_type, kind)
+
+    def compile_statements(self, node: Node) -> None:
+        """Compiles a sequence of statements."""
+        for child in node.children:
+            getattr(self, STATEMENT_COMPILERS[child.tag])(child)
+
+    def compile_do(self, node: Node) -> None:
+        """Compiles a do statement, dropping the returned value."""
+        self.compile_subroutineCall(node.children[1:-1])
+        self.writer.write_pop("temp", 0)
+
+    def compile_let(self, node: Node) -> None:
+        """Compiles a let statement."""
+        children = node.children
+        name = children[1].text
+        if children[2].text == "[":
+            self._push_variable(name)
+            self.compile_expression(children[3])
+            self.writer.write_arithmetic("add")
+            self.compile_expression(children[6])
+            self.writer.write_pop("temp", 0)
+            self.writer.write_pop("pointer", 1)
+            self.writer.write_push("temp", 0)
+            self.writer.write_pop("that", 0)
+        else:
+            self.compile_expression(children[3])
+            self.writer.write_pop(*self._variable(name))
+
+    def compile_while(self, node: Node) -> None:
+        """Compiles a while statement."""
+        children = node.children
+        start, end = self._new_label("WHILE_EXP"), self._new_label("WHILE_END")
+        self.writer.write_label(start)
+        self.compile_expression(children[2])
+        self.writer.write_arithmetic("not")
+        self.writer.write_if(end)
+        self.compile_statements(children[5])
+        self.writer.write_goto(start)
+        self.writer.write_label(end)
+
+    def compile_return(self, node: Node) -> None:
+        """Compiles a return statement."""
+        if type(node.children[1]) is Expression:
+            self.compile_expression(node.children[1])
+        else:
+            self.writer.write_push("constant", 0)
+        self.writer.write_return()
+
+    def compile_if(self, node: Node) -> None:
+        """Compiles a if statement, possibly with a trailing else clause."""
+        children = node.children
+        else_label, end = self._new_label("IF_ELSE"), self._new_label("IF_END")
+        self.compile_expression(children[2])
+        self.writer.write_arithmetic("not")
+        self.writer.write_if(else_label)
+        self.compile_statements(children[5])
+        if len(children) > 7:
+            self.writer.write_goto(end)
+            self.writer.write_label(else_label)
+            self.compile_statements(children[9])
+            self.writer.write_label(end)
+        else:
+            self.writer.write_label(else_label)
+
+    def compile_expression(self, node: Node) -> None:
+        """Compiles an expression, applying its operators from left to
+        right.
+        """
+        children = node.children
+        self.compile_term(children[0])
+        for i in range(1, len(children), 2):
+            self.compile_term(children[i + 1])
+            op = children[i].text
+            if op in BINARY_CALLS:
+                self.writer.write_call(BINARY_CALLS[op], 2)
+            else:
+                self.writer.write_arithmetic(BINARY_COMMANDS[op])
+
+    def compile_term(self, node: Node) -> None:
+        """Compiles a term."""
+        children = node.children
+        first = children[0]
+        if first.tag == "integerConstant":
+            self.writer.write_push("constant", int(first.text))
+        elif first.tag == "stringConstant":
+            self.writer.write_push("constant", len(first.text))
+            self.writer.write_call("String.new", 1)
+            for char in first.text:
+                self.writer.write_push("constant", ord(char))
+                self.writer.write_call("String.appendChar", 2)
+        elif first.tag == "keyword":
+            if first.text == "this":
+                self.writer.write_push("pointer", 0)
+            else:
+                self.writer.write_push("constant", 0)
+                if first.text == "true":
+                    self.writer.write_arithmetic("not")
+        elif first.text == "(":
+            self.compile_expression(children[1])
+        elif first.tag == "symbol":
+            self.compile_term(children[1])
+            self.writer.write_arithmetic(UNARY_COMMANDS[first.text])
+        elif len(children) > 1 and children[1].text in ("(", "."):
+            self.compile_subroutineCall(children)
+        else:
+            self._push_variable(first.text)
+            if len(children) > 1:
+                self.compile_expression(children[2])
+                self.writer.write_arithmetic("add")
+                self.writer.write_pop("pointer", 1)
+                self.writer.write_push("that", 0)
+
+    def compile_subroutineCall(self, children: typing.List) -> None:
+        """Compiles a subroutine call, given the terminals and expression
+        list it is made of.
+        """
+        n_args = 0
+        if children[1].text == "(":
+            self.writer.write_push("pointer", 0)
+            name = self.class_name + "." + children[0].text
+            n_args = 1
+        else:
+            receiver = children[0].text
+            kind = self.symbols.kind_of(receiver)
+            if kind is None:
+                name = receiver + "." + children[2].text
+            else:
+                self._push_variable(receiver)
+                name = self.symbols.type_of(receiver) + "." + \
+                    children[2].text
+                n_args = 1
+        self.compile_expression_list(children[-2])
+        n_args += (len(children[-2].children) + 1) // 2
+        self.writer.write_call(name, n_args)
+
+    def compile_expression_list(self, node: Node) -> None:
+        """Compiles a (possibly empty) comma-separated list of
+        expressions.
+        """
+        for child in node.children[::2]:
+            self.compile_expression(child)
+
+    def _variable(self, name: str) -> typing.Tuple[str, int]:
+        kind = self.symbols.kind_of(name)
+        if kind is None:
+            raise ValueError("undefined variable " + name + " in class " +
+                             self.class_name)
+        return SEGMENTS[kind], self.symbols.index_of(name)
+
+    def _push_variable(self, name: str) -> None:
+        self.writer.write_push(*self._variable(name))
+
+    def _new_label(self, prefix: str) -> str:
+        label = prefix + str(self.label_count)
+        self.label_count += 1
+        return label
+
+
+def write_vm(node: Node, output_stream: typing.TextIO, indent: int = 0,
+             optimize: bool = True) -> None:
+    """Writes the VM code of the tree. indent is ignored, it is only taken
+    for the sake of JackAST.SERIALIZERS.
+    """
+    writer = VMWriter(output_stream, optimize)
+    CodeGenerator(writer).compile_class(node)
+    writer.close()
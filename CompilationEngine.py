@@ -7,6 +7,44 @@ Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
 import typing
 import JackTokenizer
+from TokenBuffer import (
+    KEYWORD, SYMBOL, INT_CONST, STRING_CONST, IDENTIFIER,
+    K_CLASS, K_CONSTRUCTOR, K_FUNCTION, K_METHOD, K_FIELD, K_STATIC, K_VAR,
+    K_INT, K_CHAR, K_BOOLEAN, K_VOID, K_LET, K_DO, K_IF, K_ELSE, K_WHILE,
+    K_RETURN, S_LPAREN, S_RPAREN, S_LBRACKET, S_DOT, S_COMMA, S_PLUS, S_MINUS,
+    S_TIMES, S_DIVIDE, S_AND, S_OR, S_LT, S_GT, S_EQ, S_NOT, S_SHIFTLEFT,
+    S_SHIFTRIGHT)
+from XmlEmitter import XmlEmitter
+
+CLASS_VAR_KEYWORDS = frozenset((K_STATIC, K_FIELD))
+SUBROUTINE_KEYWORDS = frozenset((K_CONSTRUCTOR, K_FUNCTION, K_METHOD))
+STATEMENT_KEYWORDS = frozenset((K_LET, K_IF, K_DO, K_WHILE, K_RETURN))
+TYPE_KEYWORDS = frozenset((K_INT, K_CHAR, K_BOOLEAN))
+OPS = frozenset((S_PLUS, S_MINUS, S_TIMES, S_DIVIDE, S_AND, S_OR, S_LT, S_GT,
+                 S_EQ))
+UNARY_OPS = frozenset((S_MINUS, S_NOT, S_SHIFTLEFT, S_SHIFTRIGHT))
+# the symbols an expression can start with
+EXPRESSION_SYMBOLS = UNARY_OPS | {S_LPAREN}
+
+# Dispatch tables from the interned id of a keyword to the name of the
+# routine that compiles the construct it starts. Every engine binds them to
+# its own methods, so that subclasses can override the routines.
+DECLARATION_COMPILERS = {
+    K_CLASS: "compile_class",
+    K_STATIC: "compile_class_var_dec",
+    K_FIELD: "compile_class_var_dec",
+    K_CONSTRUCTOR: "compile_subroutine",
+    K_FUNCTION: "compile_subroutine",
+    K_METHOD: "compile_subroutine",
+    K_VAR: "compile_var_dec",
+}
+STATEMENT_COMPILERS = {
+    K_LET: "compile_let",
+    K_IF: "compile_if",
+    K_WHILE: "compile_while",
+    K_DO: "compile_do",
+    K_RETURN: "compile_return",
+}
 
 
 class CompilationEngine:
@@ -14,69 +52,77 @@ class CompilationEngine:
     output stream.
     """
 
-    def __init__(self, input_stream: "JackTokenizer", output_stream) -> None:
+    def __init__(self, input_stream: "JackTokenizer", output_stream,
+                 indent: int = 0, emitter=None) -> None:
         """
         Creates a new compilation engine with the given input and output. The
         next routine called must be compileClass()
         :param input_stream: The input stream.
         :param output_stream: The output stream.
+        :param indent: the number of spaces to indent each nesting level by.
+        :param emitter: receives the parsed structure, an XmlEmitter writing
+            to output_stream by default. A JackAST.TreeBuilder builds the parse
+            tree instead.
         """
         # Your code goes here!
         # Note that you can write to output_stream like so:
         self.output_stream = output_stream
+        if emitter is None:
+            emitter = XmlEmitter(output_stream, indent)
+        self.emitter = emitter
         self.jacktokenizer = input_stream
         self.classnames = []
+        self.declaration_compilers = {
+            key: getattr(self, name)
+            for key, name in DECLARATION_COMPILERS.items()}
+        self.statement_compilers = {
+            key: getattr(self, name)
+            for key, name in STATEMENT_COMPILERS.items()}
         # output_stream.write("Hello world! \n")
         while self.jacktokenizer.has_more_tokens():
-            token_type = self.jacktokenizer.token_type()
-            if token_type == "keyword":
-                keyword = self.jacktokenizer.keyword()
-                if keyword == 'class':
-                    self.compile_class()
-                elif keyword == 'static' or 'field':
-                    self.compile_class_var_dec()
-                elif keyword in ['constructor', 'function', 'method']:
-                    self.compile_subroutine()
-                elif keyword == 'var':
-                    self.compile_var_dec()
+            compile_declaration = self.declaration_compilers.get(
+                self.jacktokenizer.token_id())
+            if compile_declaration is None:
+                break
+            compile_declaration()
         #
         # with open("Square\Main.jack", 'r') as file:
         #     data = file.read().replace('\n', '')
         #     #print(data)
             # print(self.jacktokenizer.has_more_tokens())
             # self.jacktokenizer.advance() #MAYBE WITHOUT THIS
+        self.emitter.flush()
 
     def compile_class(self) -> None:
         """Compiles a complete class."""
-        self.output_stream.write("<class>\n")
+        self.emitter.open("class")
         self.write_keyword()
         self.write_identifier()
         self.write_symbol()
 
-        while self.jacktokenizer.keyword() == "static" or self.jacktokenizer.keyword() == "field":
+        while self.jacktokenizer.token_id() in CLASS_VAR_KEYWORDS:
             self.compile_class_var_dec()
-        while self.jacktokenizer.keyword() == "constructor" or self.jacktokenizer.keyword() == "function" \
-                or self.jacktokenizer.keyword() == "method":
+        while self.jacktokenizer.token_id() in SUBROUTINE_KEYWORDS:
             self.compile_subroutine()
         self.write_symbol()
 
-        self.output_stream.write("</class>\n")
+        self.emitter.close("class")
 
     def compile_class_var_dec(self) -> None:
         """Compiles a static declaration or a field declaration."""
-        self.output_stream.write("<classVarDec>\n")
+        self.emitter.open("classVarDec")
 
         self.write_keyword()
         self.write_type()
         self.write_identifier()
 
-        while self.jacktokenizer.symbol() == ",":
+        while self.jacktokenizer.token_id() == S_COMMA:
             self.write_symbol()
             self.write_identifier()
 
         self.write_symbol()
 
-        self.output_stream.write("</classVarDec>\n")
+        self.emitter.close("classVarDec")
 
     def compile_subroutine(self) -> None:
         """
@@ -84,10 +130,10 @@ class CompilationEngine:
         You can assume that classes with constructors have at least one field,
         you will understand why this is necessary in project 11.
         """
-        self.output_stream.write("<subroutineDec>\n")
+        self.emitter.open("subroutineDec")
 
         self.write_keyword()
-        if self.jacktokenizer.keyword() == "void":
+        if self.jacktokenizer.token_id() == K_VOID:
             self.write_keyword()
         else:
             self.write_type()
@@ -102,42 +148,42 @@ class CompilationEngine:
 
         self.compile_subroutineBody()
 
-        self.output_stream.write("</subroutineDec>\n")
+        self.emitter.close("subroutineDec")
 
     def compile_parameter_list(self) -> None:
         """Compiles a (possibly empty) parameter list, not including the 
         enclosing "()".
         """
-        self.output_stream.write("<parameterList>\n")
-        if self.jacktokenizer.token_type() == "keyword":
+        self.emitter.open("parameterList")
+        if self.jacktokenizer.token_id() != S_RPAREN:
             self.write_type()
 
             self.write_identifier()
 
-            while self.jacktokenizer.symbol() != ")":
+            while self.jacktokenizer.token_id() != S_RPAREN:
                 self.write_symbol()
                 self.write_type()
                 self.write_identifier()
 
-        self.output_stream.write("</parameterList>\n")
+        self.emitter.close("parameterList")
 
     def compile_subroutineBody(self):
         """ I added this so this is not need the open statements"""
-        self.output_stream.write("<subroutineBody>\n")
+        self.emitter.open("subroutineBody")
         self.write_symbol()
-        while self.jacktokenizer.keyword() == "var":
+        while self.jacktokenizer.token_id() == K_VAR:
             self.compile_var_dec()
-        if self.jacktokenizer.keyword() in ["let", "if", "do", "while", "return"]:
+        if self.jacktokenizer.token_id() in STATEMENT_KEYWORDS:
             self.compile_statements()
 
         self.write_symbol()
 
-        self.output_stream.write("</subroutineBody>\n")
+        self.emitter.close("subroutineBody")
 
     def compile_var_dec(self) -> None:
         """Compiles a var declaration."""
         # Your code goes here!
-        self.output_stream.write("<varDec>\n")
+        self.emitter.open("varDec")
 
         self.write_keyword()
 
@@ -145,52 +191,47 @@ class CompilationEngine:
 
         self.write_identifier()
 
-        while self.jacktokenizer.symbol() == ",":
+        while self.jacktokenizer.token_id() == S_COMMA:
             self.write_symbol()
             self.write_identifier()
 
         self.write_symbol()
-        self.output_stream.write("</varDec>\n")
+        self.emitter.close("varDec")
 
     def compile_statements(self) -> None:
         """Compiles a sequence of statements, not including the enclosing 
         "{}".
         """
 
-        self.output_stream.write("<statements>\n")
-        while self.jacktokenizer.token_type() == "keyword":
-            if self.jacktokenizer.keyword() == "let":
-                self.compile_let()
-            elif self.jacktokenizer.keyword() == "if":
-                self.compile_if()
-            elif self.jacktokenizer.keyword() == "while":
-                self.compile_while()
-            elif self.jacktokenizer.keyword() == "do":
-                self.compile_do()
-            elif self.jacktokenizer.keyword() == "return":
-                self.compile_return()
-
-        self.output_stream.write("</statements>\n")
+        self.emitter.open("statements")
+        while True:
+            compile_statement = self.statement_compilers.get(
+                self.jacktokenizer.token_id())
+            if compile_statement is None:
+                break
+            compile_statement()
+
+        self.emitter.close("statements")
 
     def compile_do(self) -> None:
         """Compiles a do statement."""
-        self.output_stream.write("<doStatement>\n")
+        self.emitter.open("doStatement")
 
         self.write_keyword()
 
         self.compile_subroutineCall()
 
         self.write_symbol()
-        self.output_stream.write("</doStatement>\n")
+        self.emitter.close("doStatement")
 
     def compile_let(self) -> None:
         """Compiles a let statement."""
         # Your code goes here!
-        self.output_stream.write("<letStatement>\n")
+        self.emitter.open("letStatement")
         self.write_keyword()
         self.write_identifier()
 
-        if self.jacktokenizer.symbol() == "[":
+        if self.jacktokenizer.token_id() == S_LBRACKET:
             self.write_symbol()
             self.compile_expression()
             self.write_symbol()
@@ -199,12 +240,12 @@ class CompilationEngine:
         self.compile_expression()
         self.write_symbol()
 
-        self.output_stream.write("</letStatement>\n")
+        self.emitter.close("letStatement")
 
     def compile_while(self) -> None:
         """Compiles a while statement."""
         # Your code goes here!
-        self.output_stream.write("<whileStatement>\n")
+        self.emitter.open("whileStatement")
 
         self.write_keyword()
         self.write_symbol()
@@ -214,24 +255,23 @@ class CompilationEngine:
         self.compile_statements()
         self.write_symbol()
 
-        self.output_stream.write("</whileStatement>\n")
+        self.emitter.close("whileStatement")
 
     def compile_return(self) -> None:
         """Compiles a return statement."""
-        self.output_stream.write("<returnStatement>\n")
+        self.emitter.open("returnStatement")
         self.write_keyword()
-        if self.jacktokenizer.token_type() != "symbol":
-            self.compile_expression()
-        elif self.jacktokenizer.symbol() in ["(", "-", "~", '^', '#']:
+        if self.jacktokenizer.token_kind() != SYMBOL or \
+                self.jacktokenizer.token_id() in EXPRESSION_SYMBOLS:
             self.compile_expression()
         self.write_symbol()
-        self.output_stream.write("</returnStatement>\n")
+        self.emitter.close("returnStatement")
 
     def compile_if(self) -> None:
         """Compiles a if statement, possibly with a trailing else clause."""
         # Your code goes here!
 
-        self.output_stream.write("<ifStatement>\n")
+        self.emitter.open("ifStatement")
         self.write_keyword()
         self.write_symbol()
         self.compile_expression()
@@ -240,25 +280,23 @@ class CompilationEngine:
         self.compile_statements()
         self.write_symbol()
 
-        if self.jacktokenizer.keyword() == "else":
+        if self.jacktokenizer.token_id() == K_ELSE:
             self.write_keyword()
             self.write_symbol()
             self.compile_statements()
             self.write_symbol()
 
-        self.output_stream.write("</ifStatement>\n")
+        self.emitter.close("ifStatement")
 
     def compile_expression(self) -> None:
         """Compiles an expression."""
-        self.output_stream.write("<expression>\n")
+        self.emitter.open("expression")
 
         self.compile_term()
-        op = ['+', '-', '*', '/', '&amp;', '|', '&lt;', '&gt;', '=']
-        while (self.jacktokenizer.token_type() == "symbol") and \
-                (self.jacktokenizer.symbol() in op):
+        while self.jacktokenizer.token_id() in OPS:
             self.write_symbol()
             self.compile_term()
-        self.output_stream.write("</expression>\n")
+        self.emitter.close("expression")
 
     def compile_term(self) -> None:
         """Compiles a term. 
@@ -271,47 +309,41 @@ class CompilationEngine:
         part of this term and should not be advanced over.
         """
         # Your code goes here!
-        self.output_stream.write("<term>\n")
+        self.emitter.open("term")
 
-        if self.jacktokenizer.token_type() == "int_const":
+        kind = self.jacktokenizer.token_kind()
+        if kind == INT_CONST:
             self.write_integerConstant()
-        elif self.jacktokenizer.token_type() == "string_const":
+        elif kind == STRING_CONST:
             self.write_stringConstant()
-        elif self.jacktokenizer.token_type() == "keyword":
+        elif kind == KEYWORD:
             self.write_keyword()
-        elif self.jacktokenizer.token_type() == "symbol":
-            if self.jacktokenizer.symbol() == "(":
+        elif kind == SYMBOL:
+            if self.jacktokenizer.token_id() == S_LPAREN:
                 self.write_symbol()
                 self.compile_expression()
                 self.write_symbol()
-            elif self.jacktokenizer.symbol() in ['-', '~', '^', '#']:
+            elif self.jacktokenizer.token_id() in UNARY_OPS:
                 self.write_symbol()
                 self.compile_term()  # recursive?
-        elif self.jacktokenizer.token_type() == "identifier":
-            self.write_identifier()
-            if self.jacktokenizer.symbol() == "[":
-                self.write_symbol()
-                self.compile_expression()
-                self.write_symbol()
-            elif self.jacktokenizer.symbol() == "(":
-                self.write_symbol()
-                self.compile_expression_list()
-                self.write_symbol()
-            elif self.jacktokenizer.symbol() == ".":
-                print("MATAN!")
-                self.write_symbol()
+        elif kind == IDENTIFIER:
+            next_id = self.jacktokenizer.peek()[1]
+            if next_id == S_LPAREN or next_id == S_DOT:
+                self.compile_subroutineCall()
+            else:
                 self.write_identifier()
-                self.write_symbol()
-                self.compile_expression_list()
-                self.write_symbol()
-        self.output_stream.write("</term>\n")
+                if next_id == S_LBRACKET:
+                    self.write_symbol()
+                    self.compile_expression()
+                    self.write_symbol()
+        self.emitter.close("term")
 
     def compile_subroutineCall(self):
         """ Compiles a subroutineCall"""
 
         self.write_identifier()
 
-        if self.jacktokenizer.symbol() == "(":
+        if self.jacktokenizer.token_id() == S_LPAREN:
             self.write_symbol()
             self.compile_expression_list()
             self.write_symbol()
@@ -325,13 +357,13 @@ class CompilationEngine:
     def compile_expression_list(self) -> None:
 
         """Compiles a (possibly empty) comma-separated list of expressions."""
-        self.output_stream.write("<expressionList>\n")
-        if self.jacktokenizer.token_type() == "symbol" and self.jacktokenizer.symbol() == ")":
-            self.output_stream.write("</expressionList>\n")
+        self.emitter.open("expressionList")
+        if self.jacktokenizer.token_id() == S_RPAREN:
+            self.emitter.close("expressionList")
             return
         # if self.jacktokenizer.token_type() != "SYMBOL" or self.jacktokenizer.symbol() in ["(", "-", "~", '^', '#']:
         self.compile_expression()
-        while (self.jacktokenizer.token_type() == "symbol") and (self.jacktokenizer.symbol() == ","):
+        while self.jacktokenizer.token_id() == S_COMMA:
             self.write_symbol()
             self.compile_expression()
         # elif self.jacktokenizer.symbol() in ["(", "-", "~", '^', '#']:
@@ -339,37 +371,32 @@ class CompilationEngine:
         #     while (self.jacktokenizer.token_type() == "SYMBOL") and (self.jacktokenizer.symbol == ","):
         #         self.write_symbol()
         #         self.compile_expression()
-        self.output_stream.write("</expressionList>\n")
+        self.emitter.close("expressionList")
 
     # the most elementary functions
     def write_keyword(self):
-        self.output_stream.write("<keyword> " +
-                                 self.jacktokenizer.keyword() + " </keyword>\n")
+        self.emitter.terminal("keyword", self.jacktokenizer.keyword())
         self.jacktokenizer.advance()
 
     def write_identifier(self):
-        self.output_stream.write("<identifier> " +
-                                 self.jacktokenizer.identifier() + " </identifier>\n")
+        self.emitter.terminal("identifier", self.jacktokenizer.identifier())
         self.jacktokenizer.advance()
 
     def write_symbol(self):
-        self.output_stream.write("<symbol> " +
-                                 self.jacktokenizer.symbol() + " </symbol>\n")
+        self.emitter.terminal("symbol", self.jacktokenizer.symbol())
         self.jacktokenizer.advance()
 
     def write_integerConstant(self):
-        self.output_stream.write("<integerConstant> " +
-                                 self.jacktokenizer.int_val() + " </integerConstant>\n")
+        self.emitter.terminal("integerConstant", self.jacktokenizer.int_val())
         self.jacktokenizer.advance()
 
     def write_stringConstant(self):
-        self.output_stream.write("<stringConstant> " +
-                                 self.jacktokenizer.string_val() + " </stringConstant>\n")
+        self.emitter.terminal("stringConstant", self.jacktokenizer.string_val())
         self.jacktokenizer.advance()
 
     def write_type(self):
-        if self.jacktokenizer.token_type() == "keyword":
-            if self.jacktokenizer.keyword() in ["int", "char", "boolean"]:
+        if self.jacktokenizer.token_kind() == KEYWORD:
+            if self.jacktokenizer.token_id() in TYPE_KEYWORDS:
                 self.write_keyword()
         else:
             self.write_identifier()
@@ -0,0 +1,229 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from JackAST import (
+    Expression, IfStatement, Node, ReturnStatement, Statements, Term, Token,
+    WhileStatement)
+from Peephole import BINARY_FOLDS as VM_FOLDS, to_word
+
+# The value of a constant is kept with whether it is a boolean, so that
+# folded conditions are written back as true or false.
+KEYWORD_CONSTANTS = {
+    "true": (-1, True),
+    "false": (0, True),
+    "null": (0, False),
+}
+# ^ and # are the shiftleft and shiftright of the extended VM, shiftright
+# keeps the sign.
+UNARY_FOLDS = {
+    "-": lambda x: -x,
+    "~": lambda x: ~x,
+    "^": lambda x: x << 1,
+    "#": lambda x: x >> 1,
+}
+# None means the result is left to run time: division by zero is an error
+# there, Math.divide does not divide -32768 the way int() does, and the
+# comparisons are those of the VM, which overflow with the subtraction they
+# compare by.
+BINARY_FOLDS = {
+    "+": lambda x, y: x + y,
+    "-": lambda x, y: x - y,
+    "*": lambda x, y: x * y,
+    "/": lambda x, y: int(x / y) if y and -32768 not in (x, y) else None,
+    "&": lambda x, y: x & y,
+    "|": lambda x, y: x | y,
+    "<": VM_FOLDS["lt"],
+    ">": VM_FOLDS["gt"],
+    "=": VM_FOLDS["eq"],
+}
+COMPARISONS = frozenset("<>=")
+# The VM code of an if or while jumps on the not of its condition, so only
+# true, all ones, takes the branch, and any other constant does not.
+TRUE = -1
+
+
+def tree_size(node: typing.Union[Node, Token]) -> int:
+    """
+    Returns:
+        int: the number of nodes and tokens in the tree under node.
+    """
+    if type(node) is Token:
+        return 1
+    return 1 + sum(map(tree_size, node.children))
+
+
+def constant_term(value: int, boolean: bool = False) -> Term:
+    """
+    Returns:
+        Term: the smallest term of the given 16-bit value.
+    """
+    if boolean:
+        return Term([Token("keyword", "true" if value else "false")])
+    if value >= 0:
+        return Term([Token("integerConstant", str(value))])
+    if value == -32768:
+        return Term([Token("symbol", "~"), constant_term(32767)])
+    return Term([Token("symbol", "-"), constant_term(-value)])
+
+
+def term_value(term: Term) -> typing.Optional[typing.Tuple[int, bool]]:
+    """
+    Returns:
+        the value of the term and whether it is a boolean, None if it is not
+        a constant.
+
+    Raises:
+        ValueError: if the term is empty, or a symbol with nothing after it.
+    """
+    children = term.children
+    if not children:
+        raise ValueError("empty term")
+    first = children[0]
+    if first.tag == "integerConstant":
+        return int(first.text), False
+    if first.tag == "keyword":
+        return KEYWORD_CONSTANTS.get(first.text)
+    if first.tag != "symbol":
+        return None
+    if len(children) < 2:
+        raise ValueError("incomplete term after " + repr(first.text))
+    if first.text == "(":
+        return expression_value(children[1])
+    value = term_value(children[1])
+    if value is None:
+        return None
+    return to_word(UNARY_FOLDS[first.text](value[0])), \
+        value[1] and first.text == "~"
+
+
+def expression_value(expression: Expression) -> typing.Optional[
+        typing.Tuple[int, bool]]:
+    """
+    Returns:
+        the value of an expression of a single constant term and whether it
+        is a boolean, None for any other expression.
+    """
+    if len(expression.children) != 1:
+        return None
+    return term_value(expression.children[0])
+
+
+def fold_binary(op: str, left: typing.Tuple[int, bool],
+                right: typing.Tuple[int, bool]) -> typing.Optional[
+        typing.Tuple[int, bool]]:
+    """
+    Returns:
+        the value of left op right and whether it is a boolean, None if it
+        is not known before run time.
+    """
+    result = BINARY_FOLDS[op](left[0], right[0])
+    if result is None:
+        return None
+    return to_word(result), op in COMPARISONS or (
+        op in "&|" and left[1] and right[1])
+
+
+class ConstantFolder:
+    """Simplifies a parse tree in place: constant expressions are replaced
+    by their value and statements that can never run are removed.
+
+    Expressions are folded from their first term on, as Jack applies
+    operators from left to right, with the 16-bit wraparound of the Hack
+    platform. An if on a constant is replaced by the statements of the
+    branch it takes, a while on any constant but true is removed, and so
+    are the statements after a return.
+    """
+
+    def __init__(self) -> None:
+        # nodes and tokens taken out of the tree so far
+        self.removed = 0
+
+    def fold(self, node: Node) -> None:
+        """Folds node and everything below it."""
+        for child in node.children:
+            if type(child) is not Token:
+                self.fold(child)
+        if type(node) is Expression:
+            self.fold_expression(node)
+        elif type(node) is Term:
+            self.fold_term(node)
+        elif type(node) is Statements:
+            self.prune_statements(node)
+
+    def fold_term(self, term: Term) -> None:
+        """Replaces a constant term by its value, if that is smaller."""
+        value = term_value(term)
+        if value is None:
+            return
+        folded = constant_term(*value)
+        saved = tree_size(term) - tree_size(folded)
+        if saved > 0:
+            term.children = folded.children
+            self.removed += saved
+
+    def fold_expression(self, expression: Expression) -> None:
+        """Folds the constant terms an expression starts with."""
+        children = expression.children
+        if not children:
+            raise ValueError("empty expression")
+        value = term_value(children[0])
+        end = 1
+        while value is not None and end < len(children):
+            right = term_value(children[end + 1])
+            result = right and fold_binary(children[end].text, value, right)
+            if result is None:
+                break
+            value = result
+            end += 2
+        if end == 1:
+            return
+        folded = constant_term(*value)
+        self.removed += sum(map(tree_size, children[:end])) - \
+            tree_size(folded)
+        children[:end] = [folded]
+
+    def prune_statements(self, statements: Statements) -> None:
+        """Removes the statements that can never run."""
+        kept = []
+        for statement in statements.children:
+            if type(statement) is IfStatement:
+                children = statement.children
+                value = expression_value(children[2])
+                if value is not None:
+                    if value[0] == TRUE:
+                        taken = children[5].children
+                    else:
+                        taken = children[9].children if len(children) > 7 \
+                            else []
+                    self.removed += tree_size(statement) - \
+                        sum(map(tree_size, taken))
+                    kept.extend(taken)
+                    continue
+            elif type(statement) is WhileStatement:
+                value = expression_value(statement.children[2])
+                if value is not None and value[0] != TRUE:
+                    self.removed += tree_size(statement)
+                    continue
+            kept.append(statement)
+        for i, statement in enumerate(kept):
+            if type(statement) is ReturnStatement:
+                self.removed += sum(map(tree_size, kept[i + 1:]))
+                del kept[i + 1:]
+                break
+        statements.children = kept
+
+
+def fold_constants(tree: Node) -> int:
+    """Folds the constants of a parse tree in place, see ConstantFolder.
+
+    Returns:
+        int: the number of nodes and tokens removed from the tree.
+    """
+    folder = ConstantFolder()
+    folder.fold(tree)
+    return folder.removed
@@ -0,0 +1,128 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from JackAST import SERIALIZERS, Node, TreeBuilder
+from XmlEmitter import XmlEmitter
+
+# The outputs a single parse can write, besides the formats of
+# JackAST.SERIALIZERS.
+TOKENS = "tokens"
+
+
+class TokenXmlEmitter:
+    """Writes only the terminals, as the <tokens> listing (the *T.xml files)
+    of the nand2tetris tokenizer tests.
+    """
+
+    # tells FanoutEmitter not to pass open() and close() on
+    terminals_only = True
+
+    def __init__(self, output_stream: typing.TextIO, indent: int = 0) -> None:
+        self.emitter = XmlEmitter(output_stream, indent)
+        self.emitter.open("tokens")
+        self.terminal = self.emitter.terminal
+
+    def open(self, tag: str) -> None:
+        pass
+
+    def close(self, tag: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        """Ends the listing, the CompilationEngine flushes once it is
+        done.
+        """
+        self.emitter.close("tokens")
+        self.emitter.flush()
+
+
+def _broadcast(methods: typing.List[typing.Callable]) -> typing.Callable:
+    """
+    Returns:
+        a function calling every one of methods with its arguments, without
+        a loop for the common cases of one or two.
+    """
+    if not methods:
+        return lambda *args: None
+    if len(methods) == 1:
+        return methods[0]
+    if len(methods) == 2:
+        first, second = methods
+
+        def call_both(*args) -> None:
+            first(*args)
+            second(*args)
+        return call_both
+
+    def call_all(*args) -> None:
+        for method in methods:
+            method(*args)
+    return call_all
+
+
+class FanoutEmitter:
+    """Passes every call of the CompilationEngine on to several emitters,
+    so that one parse feeds all of them. Emitters with a true
+    terminals_only attribute only get the terminals.
+    """
+
+    def __init__(self, emitters: typing.Sequence) -> None:
+        self.emitters = list(emitters)
+        structured = [emitter for emitter in self.emitters
+                      if not getattr(emitter, "terminals_only", False)]
+        self.open = _broadcast([emitter.open for emitter in structured])
+        self.close = _broadcast([emitter.close for emitter in structured])
+        self.terminal = _broadcast([emitter.terminal
+                                    for emitter in self.emitters])
+
+    def flush(self) -> None:
+        for emitter in self.emitters:
+            emitter.flush()
+
+
+class Pipeline:
+    """The emitters of a set of requested outputs. XML and the token
+    listing are written while parsing, every other format is serialized
+    from a parse tree built alongside them, once the parse is done.
+    """
+
+    def __init__(self, outputs: typing.Dict[str, typing.IO], indent: int = 0,
+                 stream_xml: bool = True) -> None:
+        """
+        :param outputs: output kind ("tokens" or a format of
+            JackAST.SERIALIZERS) -> the stream it is written to.
+        :param indent: the number of spaces to indent by per level.
+        :param stream_xml: write the XML while parsing, False serializes it
+            from the tree like the other formats.
+        """
+        self.indent = indent
+        self.builder = None
+        # (format, stream) of the outputs serialized from the tree
+        self.deferred = []
+        emitters = []
+        for kind, stream in outputs.items():
+            if kind == TOKENS:
+                emitters.append(TokenXmlEmitter(stream, indent))
+            elif kind == "xml" and stream_xml:
+                emitters.append(XmlEmitter(stream, indent))
+            else:
+                self.deferred.append((kind, stream))
+        if self.deferred:
+            self.builder = TreeBuilder()
+            emitters.append(self.builder)
+        self.emitter = emitters[0] if len(emitters) == 1 else \
+            FanoutEmitter(emitters)
+
+    @property
+    def tree(self) -> typing.Optional[Node]:
+        return None if self.builder is None else self.builder.root
+
+    def finish(self) -> None:
+        """Serializes the outputs that need the whole tree."""
+        for kind, stream in self.deferred:
+            SERIALIZERS[kind](self.builder.root, stream, self.indent)
@@ -0,0 +1,321 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import bisect
+import typing
+from array import array
+from CompilationEngine import CompilationEngine
+from JackAST import ClassVarDec, Node, SubroutineDec, Token, TreeBuilder
+from JackTokenizer import JackTokenizer, fill_buffer, scan_tokens
+from TokenBuffer import STRING_CONST, TokenBuffer
+
+# the children of a class that are re-parsed on their own
+DECLARATION_TYPES = (ClassVarDec, SubroutineDec)
+# An edit that makes or breaks one of these can change how the text before
+# it scans, such as where a comment opened before it ends, so the whole
+# source is scanned again.
+COMMENT_DELIMITERS = ("/*", "*/")
+
+
+def touches_comment_delimiter(text: str, start: int, end: int) -> bool:
+    """
+    Returns:
+        bool: True if text[start:end], with the character on either side of
+        it, holds a COMMENT_DELIMITERS.
+    """
+    part = text[max(start - 1, 0):end + 1]
+    return any(delimiter in part for delimiter in COMMENT_DELIMITERS)
+
+
+def count_tokens(node: typing.Union[Node, Token]) -> int:
+    """
+    Returns:
+        int: the number of terminals in node and below it.
+    """
+    if type(node) is Token:
+        return 1
+    return sum(count_tokens(child) for child in node.children)
+
+
+class Overrun(Exception):
+    """Raised by a BoundedTreeBuilder that is given too many terminals."""
+
+
+class BoundedTreeBuilder(TreeBuilder):
+    """A TreeBuilder that raises Overrun after limit terminals."""
+
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+        self.limit = limit
+
+    def terminal(self, tag: str, text: str) -> None:
+        self.limit -= 1
+        if self.limit < 0:
+            raise Overrun()
+        super().terminal(tag, text)
+
+
+class IncrementalParser:
+    """Keeps the tokens and the parse tree of one source up to date as it is
+    edited, for editors that re-analyze on every keystroke.
+
+    An edit re-scans only from the token before it until the scan lines up
+    with the old tokens again, and re-parses only the classVarDec and
+    subroutineDec declarations holding the changed tokens. Anything else,
+    such as an edit to the class header, re-parses the whole source.
+
+    While the source does not parse, for example halfway through typing a
+    statement, the tree holds what the declarations around the edits parse
+    to on their own, and may differ from a full parse. It is the same as a
+    full parse again once the source is valid.
+    """
+
+    def __init__(self, source: str) -> None:
+        """
+        :param source: the Jack source of one class.
+        """
+        self.tree = None
+        # the number of tokens of every child of the class node
+        self.sizes = []
+        # the number of tokens the last edit re-parsed
+        self.reparsed = 0
+        self._load(source)
+
+    @property
+    def buffer(self) -> typing.Optional[TokenBuffer]:
+        """The tokens of the source, None while it has an invalid token."""
+        if self._tokens is not None:
+            self._move_pivot(len(self._tokens))
+        return self._tokens
+
+    def edit(self, offset: int, deleted: int, inserted: str) -> Node:
+        """Replaces deleted characters at offset with inserted.
+
+        Returns:
+            Node: the updated JackAST.Class node. Nodes outside the re-parsed
+            declarations are kept as they were.
+
+        Raises:
+            ValueError: if the edited source has an invalid token, such as an
+                unterminated string constant. The edit is still made, and the
+                next one scans and parses the whole source.
+        """
+        if not 0 <= offset <= offset + deleted <= len(self.source):
+            raise ValueError("edit out of range: " + str(offset) + "+" +
+                             str(deleted))
+        source = self.source[:offset] + inserted + \
+            self.source[offset + deleted:]
+        if self._tokens is None or touches_comment_delimiter(
+                self.source, offset, offset + deleted) or \
+                touches_comment_delimiter(source, offset,
+                                          offset + len(inserted)):
+            self._load(source)
+            return self.tree
+        try:
+            first, old_end, new_end = self._rescan(source, offset, deleted,
+                                                   len(inserted))
+        except ValueError:
+            self.source = source
+            self._tokens = None
+            raise
+        if not self._reparse(first, old_end, new_end):
+            self._parse_all()
+        return self.tree
+
+    def _load(self, source: str) -> None:
+        """Scans and parses the whole of source."""
+        self.source = source
+        self._tokens = None
+        tokens = fill_buffer(source)
+        # The offsets of the tokens from self._pivot on are self._shift short
+        # of their true values, so that an edit does not have to move every
+        # token after it. They are signed, as a pending shift may be larger
+        # than the true offsets are.
+        tokens.starts = array('i', tokens.starts)
+        tokens.ends = array('i', tokens.ends)
+        self._tokens = tokens
+        self._pivot = len(tokens)
+        self._shift = 0
+        self._parse_all()
+
+    def _parse_all(self) -> None:
+        # bounded as in _reparse, for sources that do not parse
+        builder = BoundedTreeBuilder(2 * len(self.buffer) + 1)
+        try:
+            CompilationEngine(JackTokenizer.from_buffer(self.buffer,
+                                                        strict=False), None,
+                              emitter=builder)
+            self.tree = builder.root
+        except Overrun:
+            self.tree = None
+        self.sizes = [] if self.tree is None else \
+            [count_tokens(child) for child in self.tree.children]
+        self.reparsed = len(self._tokens)
+
+    def _move_pivot(self, pivot: int) -> None:
+        """Makes pivot the first token whose offsets are self._shift short,
+        fixing the offsets of the tokens between it and the old pivot.
+        """
+        shift = self._shift
+        if pivot > self._pivot:
+            low, high = self._pivot, pivot
+        else:
+            low, high, shift = pivot, self._pivot, -shift
+        if shift:
+            for offsets in (self._tokens.starts, self._tokens.ends):
+                offsets[low:high] = array('i', [offset + shift for offset in
+                                                offsets[low:high]])
+        self._pivot = pivot
+
+    def _find(self, offsets: array, offset: int, low: int) -> int:
+        """
+        Returns:
+            int: the index of the first of offsets, from low on, that is not
+            before offset once shifted.
+        """
+        pivot = self._pivot
+        if low < pivot:
+            index = bisect.bisect_left(offsets, offset, low, pivot)
+            if index < pivot:
+                return index
+        return bisect.bisect_left(offsets, offset - self._shift,
+                                  max(low, pivot))
+
+    def _rescan(self, source: str, offset: int, deleted: int,
+                inserted: int) -> typing.Tuple[int, int, int]:
+        """Re-scans the tokens damaged by an edit into a new buffer over
+        source.
+
+        Returns:
+            first, old_end and new_end, where the old tokens first to old_end
+            were replaced by the new tokens first to new_end.
+        """
+        old = self._tokens
+        kinds, starts, ends, ids = old.kinds, old.starts, old.ends, old.ids
+        count = len(kinds)
+        pivot = self._pivot
+        delta = inserted - deleted
+        edited_end = offset + inserted
+        # Tokens ending before the edit cannot change, and no token or
+        # comment goes on past their end, as edit() scans the whole source
+        # when a comment delimiter is edited.
+        first = self._find(ends, offset, 0)
+        if first and kinds[first - 1] == STRING_CONST and \
+                ends[first - 1] + (self._shift if first > pivot else 0) == \
+                offset - 1:
+            # the end of a string constant excludes its closing quote
+            first -= 1
+        resume = 0
+        if first:
+            resume = ends[first - 1] + (self._shift if first > pivot else 0)
+            if kinds[first - 1] == STRING_CONST:
+                resume += 1
+        # Once a new token starts where an old token after the edit started,
+        # both scans go on over the same text in the same state.
+        old_end = self._find(starts, offset + deleted, first)
+        shift = self._shift
+
+        def moved(index: int) -> int:
+            # where the old token at index starts after the edit
+            return starts[index] + delta + (shift if index >= pivot else 0)
+
+        scanned = []
+        for token in scan_tokens(source, resume):
+            start = token[1]
+            if start >= edited_end:
+                while old_end < count and moved(old_end) < start:
+                    old_end += 1
+                if old_end < count and moved(old_end) == start and \
+                        kinds[old_end] == token[0]:
+                    break
+            scanned.append(token)
+        else:
+            old_end = count
+        self._move_pivot(old_end)
+        buffer = TokenBuffer(source)
+        buffer.kinds = kinds[:first] + \
+            array('B', [token[0] for token in scanned]) + kinds[old_end:]
+        buffer.starts = starts[:first] + \
+            array('i', [token[1] for token in scanned]) + starts[old_end:]
+        buffer.ends = ends[:first] + \
+            array('i', [token[2] for token in scanned]) + ends[old_end:]
+        buffer.ids = ids[:first] + \
+            array('B', [token[3] for token in scanned]) + ids[old_end:]
+        self.source = source
+        self._tokens = buffer
+        self._pivot = first + len(scanned)
+        self._shift += delta
+        return first, old_end, self._pivot
+
+    def _reparse(self, first: int, old_end: int, new_end: int) -> bool:
+        """Re-parses the declarations holding the old tokens first to
+        old_end, now the new tokens first to new_end.
+
+        Returns:
+            bool: False if the whole source has to be re-parsed instead.
+        """
+        if self.tree is None or \
+                sum(self.sizes) != len(self._tokens) - new_end + old_end:
+            # the last full parse did not take every token
+            return False
+        if first == old_end == new_end:
+            # only whitespace or comments changed
+            self.reparsed = 0
+            return True
+        sizes = self.sizes
+        children = self.tree.children
+        # find the children holding the old tokens start to end, which
+        # include the damaged ones or the token after an insertion
+        stop = max(old_end, first + 1)
+        low = 0
+        start = 0
+        while low < len(sizes) and start + sizes[low] <= first:
+            start += sizes[low]
+            low += 1
+        high = low
+        end = start
+        while high < len(sizes) and end < stop:
+            end += sizes[high]
+            high += 1
+        if end < stop or not all(isinstance(child, DECLARATION_TYPES)
+                                 for child in children[low:high]):
+            return False
+        end += new_end - old_end
+        tokens = self._tokens.slice(start, end)
+        for offsets in (tokens.starts, tokens.ends):
+            for i in range(max(self._pivot - start, 0), end - start):
+                offsets[i] += self._shift
+        # Past the last token, the engine emits it again on every advance,
+        # forever in some loops, so the builder gives up after a few.
+        builder = BoundedTreeBuilder(2 * (end - start) + 1)
+        builder.open("class")
+        try:
+            CompilationEngine(JackTokenizer.from_buffer(tokens, strict=False),
+                              None,
+                              emitter=builder)
+        except Overrun:
+            return False
+        parsed = builder.root.children
+        if not parsed or not all(isinstance(child, DECLARATION_TYPES)
+                                 for child in parsed):
+            return False
+        parsed_sizes = [count_tokens(child) for child in parsed]
+        # While the source does not parse, the tokens the declarations left
+        # over, or took twice at the end, are counted in the last of them,
+        # so that the next edit there re-parses them.
+        parsed_sizes[-1] += end - start - sum(parsed_sizes)
+        # a class declares all of its variables before its subroutines
+        declarations = children[:low] + parsed + children[high:]
+        kinds = [type(child) for child in declarations
+                 if isinstance(child, DECLARATION_TYPES)]
+        if SubroutineDec in kinds and \
+                ClassVarDec in kinds[kinds.index(SubroutineDec):]:
+            return False
+        children[low:high] = parsed
+        sizes[low:high] = parsed_sizes
+        self.reparsed = end - start
+        return True
@@ -0,0 +1,165 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import collections
+import contextlib
+import cProfile
+import functools
+import time
+import typing
+from CompilationEngine import CompilationEngine
+from XmlEmitter import XmlEmitter
+
+# Nothing here is used unless statistics are asked for, so the plain
+# CompilationEngine and XmlEmitter pay nothing for it.
+PHASES = ("read", "tokenize", "parse", "fold", "write")
+
+
+class Stats:
+    """Counters and timers of the analysis of one or more files."""
+
+    def __init__(self) -> None:
+        self.files = 0
+        self.cache_hits = 0
+        # parse tree nodes and tokens removed by ConstantFolder
+        self.removed_nodes = 0
+        # tokens emitted, by XML tag of their type
+        self.tokens = collections.Counter()
+        # calls to every compile_* routine and their inclusive durations
+        self.calls = collections.Counter()
+        self.call_seconds = collections.Counter()
+        self.phases = collections.Counter()
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> typing.Iterator[None]:
+        """Adds the time spent in the with block to the given phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - start
+
+    def merge(self, other: "Stats") -> None:
+        """Adds the numbers of other to these."""
+        self.files += other.files
+        self.cache_hits += other.cache_hits
+        self.removed_nodes += other.removed_nodes
+        self.tokens.update(other.tokens)
+        self.calls.update(other.calls)
+        self.call_seconds.update(other.call_seconds)
+        self.phases.update(other.phases)
+
+    def to_dict(self) -> dict:
+        """The numbers as JSON-ready dicts."""
+        return {
+            "files": self.files,
+            "cache_hits": self.cache_hits,
+            "removed_nodes": self.removed_nodes,
+            "tokens": dict(self.tokens),
+            "calls": {name: {"count": count,
+                             "seconds": self.call_seconds[name]}
+                      for name, count in sorted(self.calls.items())},
+            "phases": {name: self.phases[name] for name in PHASES},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Stats":
+        """The inverse of to_dict()."""
+        stats = cls()
+        stats.files = data["files"]
+        stats.cache_hits = data["cache_hits"]
+        stats.removed_nodes = data["removed_nodes"]
+        stats.tokens.update(data["tokens"])
+        for name, call in data["calls"].items():
+            stats.calls[name] = call["count"]
+            stats.call_seconds[name] = call["seconds"]
+        stats.phases.update(data["phases"])
+        return stats
+
+
+class TimedStream:
+    """Wraps an output stream, timing its writes as the "write" phase. The
+    XmlEmitter flushes itself while parsing, so timing the stream, rather
+    than the flush() of the emitter, catches every write.
+    """
+
+    def __init__(self, stream: typing.IO, stats: Stats) -> None:
+        self.stream = stream
+        self.stats = stats
+
+    def write(self, data: typing.Union[str, bytes]) -> int:
+        with self.stats.phase("write"):
+            return self.stream.write(data)
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+
+class CountingEmitter:
+    """Wraps an emitter, counting the tokens written through it."""
+
+    def __init__(self, emitter, stats: Stats) -> None:
+        self.emitter = emitter
+        self.stats = stats
+        self.open = emitter.open
+        self.close = emitter.close
+
+    def terminal(self, tag: str, text: str) -> None:
+        self.stats.tokens[tag] += 1
+        self.emitter.terminal(tag, text)
+
+    def flush(self) -> None:
+        self.emitter.flush()
+
+
+def _timed(name: str, method: typing.Callable) -> typing.Callable:
+    @functools.wraps(method)
+    def timed_method(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.stats.calls[name] += 1
+            self.stats.call_seconds[name] += time.perf_counter() - start
+    return timed_method
+
+
+class InstrumentedCompilationEngine(CompilationEngine):
+    """A CompilationEngine that counts and times its compile_* routines and
+    the tokens it emits into stats.
+    """
+
+    def __init__(self, input_stream, output_stream, stats: Stats,
+                 indent: int = 0, emitter=None) -> None:
+        self.stats = stats
+        if emitter is None:
+            emitter = XmlEmitter(output_stream, indent)
+        super().__init__(input_stream, output_stream, indent,
+                         CountingEmitter(emitter, stats))
+
+
+for _name in dir(CompilationEngine):
+    if _name.startswith("compile_"):
+        setattr(InstrumentedCompilationEngine, _name,
+                _timed(_name, getattr(CompilationEngine, _name)))
+
+
+@contextlib.contextmanager
+def profiled(output_path: typing.Optional[str]) -> typing.Iterator[None]:
+    """Runs the with block under cProfile and dumps the profile to
+    output_path, to be read with pstats. Does nothing if output_path is None.
+    """
+    if output_path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(output_path)
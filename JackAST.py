@@ -0,0 +1,234 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import json
+import typing
+from XmlEmitter import XmlEmitter
+
+
+class Token:
+    """A terminal of the parse tree. tag is the XML tag of its token type
+    ("keyword", "symbol", "integerConstant", "stringConstant" or
+    "identifier") and text is its unescaped text.
+    """
+
+    __slots__ = ("tag", "text")
+
+    def __init__(self, tag: str, text: str) -> None:
+        self.tag = tag
+        self.text = text
+
+    def __repr__(self) -> str:
+        return "Token(" + repr(self.tag) + ", " + repr(self.text) + ")"
+
+
+class Node:
+    """A non-terminal of the parse tree, holding its children in source
+    order. Every grammar rule has its own subclass, named after it.
+    """
+
+    __slots__ = ("children",)
+    tag = None
+
+    def __init__(self, children: typing.Optional[list] = None) -> None:
+        self.children = [] if children is None else children
+
+    def __iter__(self) -> typing.Iterator[typing.Union["Node", Token]]:
+        return iter(self.children)
+
+    def __repr__(self) -> str:
+        return type(self).__name__ + "(" + repr(self.children) + ")"
+
+
+class Class(Node):
+    __slots__ = ()
+    tag = "class"
+
+
+class ClassVarDec(Node):
+    __slots__ = ()
+    tag = "classVarDec"
+
+
+class SubroutineDec(Node):
+    __slots__ = ()
+    tag = "subroutineDec"
+
+
+class ParameterList(Node):
+    __slots__ = ()
+    tag = "parameterList"
+
+
+class SubroutineBody(Node):
+    __slots__ = ()
+    tag = "subroutineBody"
+
+
+class VarDec(Node):
+    __slots__ = ()
+    tag = "varDec"
+
+
+class Statements(Node):
+    __slots__ = ()
+    tag = "statements"
+
+
+class LetStatement(Node):
+    __slots__ = ()
+    tag = "letStatement"
+
+
+class IfStatement(Node):
+    __slots__ = ()
+    tag = "ifStatement"
+
+
+class WhileStatement(Node):
+    __slots__ = ()
+    tag = "whileStatement"
+
+
+class DoStatement(Node):
+    __slots__ = ()
+    tag = "doStatement"
+
+
+class ReturnStatement(Node):
+    __slots__ = ()
+    tag = "returnStatement"
+
+
+class Expression(Node):
+    __slots__ = ()
+    tag = "expression"
+
+
+class Term(Node):
+    __slots__ = ()
+    tag = "term"
+
+
+class ExpressionList(Node):
+    __slots__ = ()
+    tag = "expressionList"
+
+
+NODE_TYPES = {node_type.tag: node_type for node_type in (
+    Class, ClassVarDec, SubroutineDec, ParameterList, SubroutineBody, VarDec,
+    Statements, LetStatement, IfStatement, WhileStatement, DoStatement,
+    ReturnStatement, Expression, Term, ExpressionList)}
+
+
+# The token types whose Token objects a TreeBuilder shares between every
+# occurrence of the same text in a tree, as BinaryFormat.decode() does.
+SHARED_TOKEN_TAGS = ("keyword", "symbol", "identifier")
+
+
+class TreeBuilder:
+    """Takes the place of an XmlEmitter in the CompilationEngine, building
+    the parse tree instead of writing it out.
+    """
+
+    def __init__(self) -> None:
+        self.root = None
+        self._stack = []
+        # tag -> text -> the Token of every occurrence, see SHARED_TOKEN_TAGS
+        self._shared = {tag: {} for tag in SHARED_TOKEN_TAGS}
+
+    def open(self, tag: str) -> None:
+        node = NODE_TYPES[tag]()
+        if self._stack:
+            self._stack[-1].children.append(node)
+        else:
+            self.root = node
+        self._stack.append(node)
+
+    def close(self, tag: str) -> None:
+        self._stack.pop()
+
+    def terminal(self, tag: str, text: str) -> None:
+        shared = self._shared.get(tag)
+        if shared is None:
+            token = Token(tag, text)
+        else:
+            token = shared.get(text)
+            if token is None:
+                token = shared[text] = Token(tag, text)
+        self._stack[-1].children.append(token)
+
+    def flush(self) -> None:
+        """Drops the shared tokens, the parse is done."""
+        for shared in self._shared.values():
+            shared.clear()
+
+
+def write_xml(node: Node, output_stream: typing.TextIO,
+              indent: int = 0) -> None:
+    """Writes the tree as the XML the CompilationEngine emits."""
+    emitter = XmlEmitter(output_stream, indent)
+    emit_xml(node, emitter)
+    emitter.flush()
+
+
+def emit_xml(node: typing.Union[Node, Token], emitter: XmlEmitter) -> None:
+    """Emits the XML of node and everything below it."""
+    if type(node) is Token:
+        emitter.terminal(node.tag, node.text)
+        return
+    emitter.open(node.tag)
+    for child in node.children:
+        emit_xml(child, emitter)
+    emitter.close(node.tag)
+
+
+def to_dict(node: typing.Union[Node, Token]) -> dict:
+    """
+    Returns:
+        dict: the tree as nested dicts, {"type": tag, "children": [...]} for
+        non-terminals and {"type": tag, "text": text} for terminals.
+    """
+    if type(node) is Token:
+        return {"type": node.tag, "text": node.text}
+    return {"type": node.tag,
+            "children": [to_dict(child) for child in node.children]}
+
+
+def write_json(node: Node, output_stream: typing.TextIO,
+               indent: int = 0) -> None:
+    """Writes the tree as JSON, see to_dict()."""
+    json.dump(to_dict(node), output_stream, indent=indent or None)
+    output_stream.write("\n")
+
+
+def write_vm(node: Node, output_stream: typing.TextIO,
+             indent: int = 0) -> None:
+    """Writes the optimized VM code of the tree, see CodeGenerator."""
+    # imported here, as CodeGenerator imports this module
+    import CodeGenerator
+    CodeGenerator.write_vm(node, output_stream, indent)
+
+
+def write_binary(node: Node, output_stream: typing.BinaryIO,
+                 indent: int = 0) -> None:
+    """Writes the tree in the binary format of BinaryFormat."""
+    # imported here, as BinaryFormat imports this module
+    import BinaryFormat
+    BinaryFormat.write_binary(node, output_stream, indent)
+
+
+# The output formats a parse tree can be written in, by name. Every
+# serializer takes the tree, the output stream and an indent.
+SERIALIZERS = {
+    "xml": write_xml,
+    "json": write_json,
+    "vm": write_vm,
+    "jbin": write_binary,
+}
+# The formats written as bytes, their output stream must be binary.
+BINARY_FORMATS = frozenset(("jbin",))
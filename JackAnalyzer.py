@@ -5,48 +5,463 @@ was written by Aviv Yaish. It is an extension to the specifications given
 as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import argparse
+import concurrent.futures
+import contextlib
+import functools
+import io
+import json
 import os
 import sys
+import time
 import typing
+from BuildCache import BuildCache
 from CompilationEngine import CompilationEngine
-from JackTokenizer import JackTokenizer
+from ConstantFolder import fold_constants
+from EmitterPipeline import TOKENS, Pipeline
+from Instrumentation import (
+    InstrumentedCompilationEngine, Stats, TimedStream, profiled)
+from JackAST import BINARY_FORMATS, SERIALIZERS, Node, TreeBuilder
+from JackTokenizer import ENGINES, JackTokenizer
+from MappedIO import (
+    IO_MODES, OUTPUT_SIZE_RATIO, OutputBuffer, SourceStream, read_source)
+from ParallelParser import SubroutinePool
+from SourcePositions import JackSyntaxError
+from Watcher import DEFAULT_DEBOUNCE, watch
+
+
+class FileResult(typing.NamedTuple):
+    """The outcome of analyze_path: the error message if the file failed and
+    its Stats.to_dict() if statistics were collected.
+    """
+    error: typing.Optional[str] = None
+    stats: typing.Optional[dict] = None
 
 
 def analyze_file(
-        input_file: typing.TextIO, output_file: typing.TextIO) -> None:
+        input_file: typing.TextIO, output_file: typing.TextIO,
+        scanner: str = "regex", indent: int = 0,
+        output_format: str = "xml",
+        stats: typing.Optional[Stats] = None, fold: bool = False,
+        outputs: typing.Optional[typing.Dict[str, typing.IO]] = None) -> None:
     """Analyzes a single file.
     Args:
         input_file (typing.TextIO): the file to analyze.
         output_file (typing.TextIO): writes all output to this file.
+        scanner (str): the JackTokenizer engine to use, one of ENGINES.
+        indent (int): the number of spaces to indent the output by per level.
+        output_format (str): one of JackAST.SERIALIZERS. XML is written while
+            parsing, any other format is serialized from the parse tree.
+        stats (Stats): if given, the counters and phase timers of this file
+            are added to it.
+        fold (bool): fold constant expressions and remove the statements
+            that can never run before writing, see ConstantFolder. The output
+            is then always serialized from the parse tree.
+        outputs (typing.Dict[str, typing.IO]): more outputs written from the
+            same tokenization and parse, by kind: "tokens" for the token
+            listing of *T.xml files, or a format of JackAST.SERIALIZERS.
     """
+    requested = {output_format: output_file}
+    if outputs:
+        requested.update(outputs)
+    if stats is not None:
+        analyze_file_with_stats(input_file, requested, stats, scanner, indent,
+                                fold)
+        return
+    pipeline = Pipeline(requested, indent, stream_xml=not fold)
     # Your code goes here!
     # It might be good to start by creating a new JackTokenizer and CompilationEngine:
-    tokenizer = JackTokenizer(input_file)
-    engine = CompilationEngine(tokenizer, output_file)
-    while tokenizer.has_more_tokens():
-        engine(tokenizer, output_file)
+    tokenizer = JackTokenizer(input_file, scanner)
+    CompilationEngine(tokenizer, None, indent, pipeline.emitter)
+    check_parsed(tokenizer)
+    if fold:
+        fold_constants(pipeline.tree)
+    pipeline.finish()
 
 
-if "__main__" == __name__:
+def analyze_file_with_stats(
+        input_file: typing.TextIO, outputs: typing.Dict[str, typing.IO],
+        stats: Stats, scanner: str = "regex", indent: int = 0,
+        fold: bool = False) -> None:
+    """analyze_file, adding its counters and timers to stats. The input is
+    read up front, so that reading and tokenizing are timed apart. Writes to
+    the outputs are timed as "write", whenever they happen.
+    """
+    stats.files += 1
+    outputs = {kind: TimedStream(stream, stats)
+               for kind, stream in outputs.items()}
+    with stats.phase("read"):
+        source = input_file.read()
+    with stats.phase("tokenize"):
+        tokenizer = JackTokenizer(io.StringIO(source), scanner)
+    pipeline = Pipeline(outputs, indent, stream_xml=not fold)
+    write_seconds = stats.phases["write"]
+    with stats.phase("parse"):
+        InstrumentedCompilationEngine(tokenizer, None, stats, indent,
+                                      pipeline.emitter)
+        check_parsed(tokenizer)
+    # the XML is flushed while parsing, that time is counted as "write"
+    stats.phases["parse"] -= stats.phases["write"] - write_seconds
+    if fold:
+        with stats.phase("fold"):
+            stats.removed_nodes += fold_constants(pipeline.tree)
+    # serializing the tree is writing too, its writes to the streams are
+    # timed already and are not counted twice
+    write_seconds = stats.phases["write"]
+    start = time.perf_counter()
+    pipeline.finish()
+    stats.phases["write"] = write_seconds + time.perf_counter() - start
+
+
+def parse_tree(input_file: typing.TextIO, scanner: str = "regex") -> Node:
+    """Parses a single file into its parse tree.
+    Args:
+        input_file (typing.TextIO): the file to parse.
+        scanner (str): the JackTokenizer engine to use, one of ENGINES.
+
+    Returns:
+        Node: the JackAST.Class node of the file.
+    """
+    builder = TreeBuilder()
+    tokenizer = JackTokenizer(input_file, scanner)
+    CompilationEngine(tokenizer, None, emitter=builder)
+    check_parsed(tokenizer)
+    return builder.root
+
+
+def check_parsed(tokenizer: JackTokenizer) -> None:
+    """Makes sure that a parse took every token of its input.
+
+    Raises:
+        JackSyntaxError: at the first token left, where the parse stopped.
+    """
+    # the parse advances past the last token once it took it, so it left
+    # the current token unless it did
+    if not tokenizer.past_end():
+        raise tokenizer.error("unexpected " + repr(tokenizer.current_word()))
+
+
+def find_jack_files(argument_path: str) -> typing.List[str]:
+    """Lists the .jack files to analyze, in a stable order.
+
+    Args:
+        argument_path (str): a .jack file or a directory, which is searched
+            recursively.
+
+    Returns:
+        typing.List[str]: the paths of the files to analyze.
+    """
+    if not os.path.isdir(argument_path):
+        return [argument_path] if is_jack_file(argument_path) else []
+    files_to_assemble = []
+    for directory, subdirectories, filenames in os.walk(argument_path):
+        subdirectories.sort()
+        files_to_assemble.extend(
+            os.path.join(directory, filename) for filename in sorted(filenames)
+            if is_jack_file(filename))
+    return files_to_assemble
+
+
+def is_jack_file(path: str) -> bool:
+    """Is the given path named like a Jack source file?"""
+    return os.path.splitext(path)[1].lower() == ".jack"
+
+
+def output_path_of(input_path: str, kind: str) -> str:
+    """
+    Returns:
+        str: where analyze_path writes the output of the given kind, next to
+        the input: <name>T.xml for "tokens", <name>.<format> otherwise.
+    """
+    base = os.path.splitext(input_path)[0]
+    return base + "T.xml" if kind == TOKENS else base + "." + kind
+
+
+def analyze_path(input_path: str, scanner: str = "regex",
+                 cache: typing.Optional[BuildCache] = None,
+                 indent: int = 0, output_format: str = "xml",
+                 collect_stats: bool = False,
+                 fold: bool = False, io_mode: str = "text",
+                 outputs: typing.Sequence[str] = (),
+                 subroutine_pool: typing.Optional[SubroutinePool] = None
+                 ) -> FileResult:
+    """Analyzes a single .jack file into the output files next to it, see
+    output_path_of().
+    Errors are caught so that one bad file does not stop a whole batch.
+
+    Args:
+        input_path (str): the file to analyze.
+        scanner (str): the JackTokenizer engine to use.
+        cache (BuildCache): if given, an unchanged file is not analyzed again
+            and its cached outputs are reused.
+        indent (int): the number of spaces to indent the output by per level.
+        output_format (str): one of JackAST.SERIALIZERS.
+        collect_stats (bool): collect the Stats of the file.
+        fold (bool): fold constants before writing, see analyze_file.
+        io_mode (str): one of MappedIO.IO_MODES. "mmap" reads the input
+            through a memory map and writes each output with a single
+            os.write() once it is complete.
+        outputs (typing.Sequence[str]): more kinds of output to write from
+            the same parse, see analyze_file.
+        subroutine_pool (SubroutinePool): if given, the subroutines of a
+            large file are parsed on its workers. Only plain XML output of
+            the regex engine, without statistics or folding, is parsed so.
+
+    Returns:
+        FileResult: the error message if the file failed, and its stats.
+    """
+    kinds = [output_format] + [kind for kind in outputs
+                               if kind != output_format]
+    output_paths = {kind: output_path_of(input_path, kind) for kind in kinds}
+    stats = Stats() if collect_stats else None
+    try:
+        keys = None
+        if cache is not None:
+            keys = cache.keys(input_path, kinds, scanner, str(indent),
+                              *(["fold"] if fold else []))
+            if all(cache.restore(keys[kind], output_paths[kind])
+                   for kind in kinds):
+                if stats is not None:
+                    stats.files += 1
+                    stats.cache_hits += 1
+                    return FileResult(stats=stats.to_dict())
+                return FileResult()
+        if subroutine_pool is not None and (
+                kinds != ["xml"] or scanner != "regex" or stats is not None or
+                fold):
+            subroutine_pool = None
+        if io_mode == "mmap":
+            source = read_source(input_path)
+            buffers = {kind: OutputBuffer(len(source) * OUTPUT_SIZE_RATIO)
+                       for kind in kinds}
+            if subroutine_pool is None or not subroutine_pool.analyze(
+                    source, buffers[output_format], indent):
+                analyze_file(SourceStream(source), buffers[output_format],
+                             scanner, indent, output_format, stats, fold,
+                             {kind: buffers[kind] for kind in kinds[1:]})
+            for kind, output_file in buffers.items():
+                output_file.write_file(output_paths[kind])
+        else:
+            with contextlib.ExitStack() as files:
+                input_file = files.enter_context(open(input_path, 'r'))
+                streams = {kind: files.enter_context(open(
+                    output_paths[kind],
+                    'wb' if kind in BINARY_FORMATS else 'w'))
+                    for kind in kinds}
+                if subroutine_pool is not None:
+                    source = input_file.read()
+                    if subroutine_pool.analyze(source, streams[output_format],
+                                               indent):
+                        input_file = None
+                    else:
+                        input_file = SourceStream(source)
+                if input_file is not None:
+                    analyze_file(input_file, streams[output_format], scanner,
+                                 indent, output_format, stats, fold,
+                                 {kind: streams[kind] for kind in kinds[1:]})
+        if cache is not None:
+            for kind in kinds:
+                cache.store(keys[kind], output_paths[kind])
+    except Exception as error:
+        for output_path in output_paths.values():
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        if isinstance(error, JackSyntaxError) and error.lines is None:
+            # the tokenizer did not keep the source, only now is it needed
+            error.locate(read_source(input_path))
+        return FileResult(type(error).__name__ + ": " + str(error))
+    return FileResult(stats=stats.to_dict() if stats is not None else None)
+
+
+def analyze_paths(input_paths: typing.List[str], jobs: int = 1,
+                  executor: typing.Optional[
+                      concurrent.futures.Executor] = None,
+                  **options) -> typing.List[FileResult]:
+    """Analyzes many files, spreading them over a process pool.
+
+    Args:
+        input_paths (typing.List[str]): the files to analyze.
+        jobs (int): the number of worker processes, 1 runs in this process.
+        executor (concurrent.futures.Executor): an existing pool of jobs
+            workers to use instead of starting a new one.
+        options: keyword arguments passed on to analyze_path.
+
+    Returns:
+        typing.List[FileResult]: the result of analyze_path for every input
+        path, in the same order.
+    """
+    analyze = functools.partial(analyze_path, **options)
+    count = len(input_paths)
+    if jobs <= 1 or count <= 1:
+        return [analyze(input_path) for input_path in input_paths]
+    chunksize = max(1, count // (jobs * 4))
+    if executor is not None:
+        return list(executor.map(analyze, input_paths, chunksize=chunksize))
+    with concurrent.futures.ProcessPoolExecutor(min(jobs, count)) as executor:
+        return list(executor.map(analyze, input_paths, chunksize=chunksize))
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    """Runs the JackAnalyzer command line.
+
+    Args:
+        argv (typing.List[str]): the arguments, sys.argv[1:] if None.
+
+    Returns:
+        int: the exit code, 1 if any file failed.
+    """
     # Parses the input path and calls analyze_file on each input file.
     # This opens both the input and the output files!
     # Both are closed automatically when the code finishes running.
     # If the output file does not exist, it is created automatically in the
     # correct path, using the correct filename.
-    if not len(sys.argv) == 2:
-        sys.exit("Invalid usage, please use: JackAnalyzer <input path>")
-    argument_path = os.path.abspath(sys.argv[1])
-    if os.path.isdir(argument_path):
-        files_to_assemble = [
-            os.path.join(argument_path, filename)
-            for filename in os.listdir(argument_path)]
-    else:
-        files_to_assemble = [argument_path]
-    for input_path in files_to_assemble:
-        filename, extension = os.path.splitext(input_path)
-        if extension.lower() != ".jack":
-            continue
-        output_path = filename + ".xml"
-        with open(input_path, 'r') as input_file, \
-                open(output_path, 'w') as output_file:
-            analyze_file(input_file, output_file)
+    parser = argparse.ArgumentParser(
+        prog="JackAnalyzer",
+        usage="JackAnalyzer [options] <input path>")
+    parser.add_argument("input_path")
+    parser.add_argument("--scanner", choices=ENGINES, default="regex",
+                        help="tokenizer engine (default: regex)")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: the "
+                             "number of CPUs)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always analyze, without reading or writing "
+                             "the build cache")
+    parser.add_argument("--cache-dir",
+                        help="build cache directory (default: "
+                             "$XDG_CACHE_HOME/JackAnalyzer)")
+    parser.add_argument("--cache-size", type=int, default=512,
+                        help="build cache size limit in MB (default: 512)")
+    parser.add_argument("--cache-age", type=float, default=30,
+                        help="evict cache entries unused for this many days "
+                             "(default: 30)")
+    parser.add_argument("--indent", type=int, default=0,
+                        help="indent the output by this many spaces per "
+                             "nesting level (default: 0)")
+    parser.add_argument("--format", choices=sorted(SERIALIZERS),
+                        default="xml",
+                        help="output format, also the output file extension "
+                             "(default: xml)")
+    parser.add_argument("--emit", action="append", default=[],
+                        choices=[TOKENS] + sorted(SERIALIZERS),
+                        metavar="KIND",
+                        help="also write this output from the same parse, "
+                             "tokens for the <name>T.xml token listing or "
+                             "any --format, can be repeated")
+    parser.add_argument("--fold", action="store_true",
+                        help="fold constant expressions and remove "
+                             "statements that can never run, --stats "
+                             "reports the removed nodes")
+    parser.add_argument("--io", choices=IO_MODES, default="text",
+                        help="how files are read and written: mmap maps "
+                             "the input and writes each output with one "
+                             "system call (default: text)")
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument("--split-subroutines", action="store_true",
+                       help="parse the subroutines of each large file on "
+                            "the --jobs workers, one file at a time, "
+                            "instead of spreading the files over them")
+    modes.add_argument("--pipeline", action="store_true",
+                       help="read, analyze and write files at the same "
+                            "time, with bounded queues between the stages, "
+                            "for slow or network storage")
+    parser.add_argument("--io-workers", type=int, default=4,
+                        help="files read, and files written, at a time in "
+                             "--pipeline mode (default: %(default)s)")
+    parser.add_argument("--queue-size", type=int,
+                        help="files waiting between two stages in "
+                             "--pipeline mode (default: 2 per job)")
+    parser.add_argument("--watch", action="store_true",
+                        help="after the first run, keep analyzing the .jack "
+                             "files that change until interrupted, then exit "
+                             "with the status of the first run")
+    parser.add_argument("--debounce", type=float, default=DEFAULT_DEBOUNCE,
+                        help="seconds without changes that end a burst of "
+                             "saves in --watch mode (default: %(default)s)")
+    parser.add_argument("--stats", choices=("json",),
+                        help="print per-file and total token counts, "
+                             "compile_* call counts and durations and phase "
+                             "timings to stdout")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="run in this process under cProfile and write "
+                             "the profile to FILE")
+    args = parser.parse_args(argv)
+    argument_path = os.path.abspath(args.input_path)
+    files_to_assemble = find_jack_files(argument_path)
+    cache = None
+    if not args.no_cache:
+        cache = BuildCache(args.cache_dir, args.cache_size << 20,
+                           args.cache_age * 24 * 60 * 60)
+    jobs = 1 if args.profile else args.jobs
+    options = dict(scanner=args.scanner, cache=cache, indent=args.indent,
+                   output_format=args.format,
+                   collect_stats=args.stats is not None, fold=args.fold,
+                   io_mode=args.io, outputs=args.emit)
+    with contextlib.ExitStack() as pools:
+        if args.split_subroutines and jobs > 1:
+            options["subroutine_pool"] = pools.enter_context(
+                SubroutinePool(jobs))
+            jobs = 1
+        with profiled(args.profile):
+            if args.pipeline:
+                # imported here, as AsyncPipeline imports this module
+                import AsyncPipeline
+                results = AsyncPipeline.run_pipeline(
+                    files_to_assemble, jobs, io_workers=args.io_workers,
+                    queue_size=args.queue_size, **options)
+            else:
+                results = analyze_paths(files_to_assemble, jobs, **options)
+    options.pop("subroutine_pool", None)
+    if cache is not None:
+        cache.evict()
+    failed = report(files_to_assemble, results, args.stats)
+    if not args.watch:
+        return 1 if failed else 0
+
+    def on_change(changed_paths: typing.List[str]) -> None:
+        # the files are analyzed in this process, where the modules,
+        # compiled patterns and cache are already loaded
+        start = time.perf_counter()
+        changed_results = analyze_paths(changed_paths, 1, **options)
+        changed_failed = report(changed_paths, changed_results, args.stats)
+        if cache is not None:
+            cache.evict()
+        print("analyzed %d file(s), %d failed, in %.0f ms" % (
+            len(changed_paths), changed_failed,
+            (time.perf_counter() - start) * 1000), file=sys.stderr)
+
+    print("watching " + argument_path + " for changes", file=sys.stderr)
+    try:
+        watch(argument_path, is_jack_file, on_change, args.debounce)
+    except KeyboardInterrupt:
+        pass
+    return 1 if failed else 0
+
+
+def report(input_paths: typing.List[str], results: typing.List[FileResult],
+           stats_format: typing.Optional[str] = None) -> int:
+    """Prints the errors of analyze_paths to stderr, and the statistics if
+    stats_format is "json" to stdout.
+
+    Returns:
+        int: the number of files that failed.
+    """
+    failed = 0
+    for input_path, result in zip(input_paths, results):
+        if result.error is not None:
+            failed += 1
+            print(input_path + ": " + result.error, file=sys.stderr)
+    if stats_format == "json":
+        total = Stats()
+        per_file = {}
+        for input_path, result in zip(input_paths, results):
+            if result.stats is not None:
+                per_file[input_path] = result.stats
+                total.merge(Stats.from_dict(result.stats))
+        json.dump({"files": per_file, "total": total.to_dict()}, sys.stdout,
+                  indent=2)
+        print()
+    return failed
+
+if "__main__" == __name__:
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+import typing
+
+# This module is started once per analyzed path, so it only imports the
+# standard library. The analyzer itself is imported only when no
+# AnalyzerServer is listening and the path has to be analyzed locally.
+
+
+def default_socket_path() -> str:
+    """
+    Returns:
+        str: $JACK_ANALYZER_SOCKET, or a per-user socket in $XDG_RUNTIME_DIR
+        or the temporary directory.
+    """
+    if os.environ.get("JACK_ANALYZER_SOCKET"):
+        return os.environ["JACK_ANALYZER_SOCKET"]
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(base, "JackAnalyzer-" + str(os.getuid()) + ".sock")
+
+
+def send_request(request: dict, socket_path: str) -> dict:
+    """Sends one request to an AnalyzerServer and waits for its response.
+
+    Raises:
+        OSError: if no server listens on socket_path.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode() + b"\n")
+        with connection.makefile('rb') as responses:
+            line = responses.readline()
+    if not line:
+        raise ConnectionError("the server closed the connection")
+    return json.loads(line)
+
+
+def without_socket(argv: typing.List[str]) -> typing.List[str]:
+    """
+    Returns:
+        argv without its --socket option, written as two arguments, with an
+        "=" or abbreviated, which the local analyzer does not take.
+    """
+    local_argv = []
+    arguments = iter(argv)
+    for argument in arguments:
+        if argument == "--":
+            local_argv.append(argument)
+            local_argv.extend(arguments)
+            break
+        name, equals, _ = argument.partition("=")
+        # "--s" alone is ambiguous with --scanner
+        if len(name) > 3 and "--socket".startswith(name):
+            if not equals:
+                next(arguments, None)
+            continue
+        local_argv.append(argument)
+    return local_argv
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    """Takes the same arguments as JackAnalyzer and has the same effect, but
+    lets a running AnalyzerServer do the work.
+
+    Returns:
+        int: the exit code, 1 if any file failed.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog="JackAnalyzerClient",
+        usage="JackAnalyzerClient [--socket PATH] [options] <input path>")
+    parser.add_argument("input_path")
+    parser.add_argument("--socket", default=default_socket_path())
+    parser.add_argument("--scanner", default="regex")
+    parser.add_argument("--indent", type=int, default=0)
+    parser.add_argument("--format", default="xml")
+    args, others = parser.parse_known_args(argv)
+    local_argv = without_socket(argv)
+    if others:
+        # options only the local analyzer knows about
+        return run_locally(local_argv)
+    request = {
+        "path": os.path.abspath(args.input_path),
+        "write": True,
+        "scanner": args.scanner,
+        "indent": args.indent,
+        "format": args.format,
+    }
+    try:
+        response = send_request(request, args.socket)
+    except OSError:
+        return run_locally(local_argv)
+    if "error" in response:
+        print(response["error"], file=sys.stderr)
+        return 1
+    for input_path, error in response.get("errors", {}).items():
+        print(input_path + ": " + error, file=sys.stderr)
+    return 0 if response["ok"] else 1
+
+
+def run_locally(argv: typing.List[str]) -> int:
+    """Runs the analyzer in this process, when no server is available."""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import JackAnalyzer
+    return JackAnalyzer.main(argv)
+
+
+if "__main__" == __name__:
+    sys.exit(main())
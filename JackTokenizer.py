@@ -5,14 +5,288 @@ was written by Aviv Yaish. It is an extension to the specifications given
 as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
 Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
 """
+import collections
+import io
 import typing
 import re
+from sys import intern
+from SourcePositions import JackSyntaxError, LineIndex
+from TokenBuffer import (
+    KEYWORD, SYMBOL, INT_CONST, STRING_CONST, IDENTIFIER, TOKEN_TYPE_NAMES,
+    INTERNED, INTERNED_IDS, KEYWORD_IDS, KEYWORD_TABLE, SYMBOL_IDS, NO_ID, TokenBuffer)
 
 SYMBOLS = {'{' , '}' , '(' , ')' , '[' , ']' , '.' , ',' , ';' , '+' ,
               '-' , '*' , '/' , '&' , '|' , '<' , '>' , '=' , '~' , '^' , '#'}
 SYMBOL_REGEX = '{|}|\(|\)|\[|\]|\.|,|;|\+|-|\*|\/|&|\||<|>|=|~|\^|#'
 KEYWORD_REGEX = 'class|constructor|function|method|field|static|var|int|char|boolean|void|true|false|null|this|let|do|if|else|while|return'
 
+# One precompiled alternation for the whole lexical grammar. Whitespace and
+# comments are matched by the "skip" group, keywords are told apart from
+# identifiers by a dict lookup on the "word" group. A "/*" that "skip" did
+# not match has no "*/" after it, and is matched by "open_comment".
+_SKIP = r'''\s+|//[^\n]*|/\*[\s\S]*?\*/'''
+_TOKENS = r'''
+    |(?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    |(?P<int_const>[0-9]+)
+    |(?P<string_const>"[^"\n]*")
+    |(?P<open_comment>/\*)
+    |(?P<symbol>[{}()\[\].,;+\-*/&|<>=~^#])
+'''
+TOKEN_REGEX = re.compile(
+    r'(?P<skip>(?:' + _SKIP + r')+)' + _TOKENS, re.VERBOSE)
+# The streaming scanner matches one comment or whitespace run at a time, so it
+# can tell which of them was cut by the end of a chunk.
+STREAM_REGEX = re.compile(r'(?P<skip>' + _SKIP + r')' + _TOKENS, re.VERBOSE)
+DEFAULT_CHUNK_SIZE = 1 << 16
+ENGINES = ("regex", "stream", "legacy")
+# How far peek() can look ahead, and reset() can go back, when the tokens are
+# not kept in a TokenBuffer.
+RING_SIZE = 4
+
+# The patterns of the "legacy" engine, tried in order at every position.
+_LEGACY_SPACE = re.compile(r'\s*')
+_LEGACY_PATTERNS = (
+    (KEYWORD, re.compile(
+        r'(' + KEYWORD_REGEX + r')(?=(' + SYMBOL_REGEX + r'|\s+))')),
+    (INT_CONST, re.compile(r'([0-9]+)(?=(' + SYMBOL_REGEX + r'|\s+))')),
+    (STRING_CONST, re.compile(r'(")(.+)(")')),
+    (IDENTIFIER, re.compile(r'([A-Z]|[a-z]|_|[0-9])+')),
+)
+
+
+def fill_buffer(source: str,
+                buffer: typing.Optional[TokenBuffer] = None) -> TokenBuffer:
+    """Scans the whole source in one pass and stores its tokens.
+
+    Args:
+        source (str): the Jack source to scan.
+        buffer (TokenBuffer): the buffer to append to, a new one over source
+            is created if not given.
+
+    Returns:
+        TokenBuffer: the buffer holding the tokens of source.
+    """
+    if buffer is None:
+        buffer = TokenBuffer(source)
+    add_kind = buffer.kinds.append
+    add_start = buffer.starts.append
+    add_end = buffer.ends.append
+    add_id = buffer.ids.append
+    match = TOKEN_REGEX.match
+    keyword_id = KEYWORD_IDS.get
+    pos = 0
+    length = len(source)
+    while pos < length:
+        token = match(source, pos)
+        if token is None:
+            raise JackSyntaxError("invalid token", pos, LineIndex(source))
+        kind = token.lastgroup
+        start, pos = token.span()
+        if kind == "skip":
+            continue
+        if kind == "word":
+            ident = keyword_id(token.group())
+            if ident is None:
+                add_kind(IDENTIFIER)
+                add_id(NO_ID)
+            else:
+                add_kind(KEYWORD)
+                add_id(ident)
+        elif kind == "symbol":
+            add_kind(SYMBOL)
+            add_id(SYMBOL_IDS[source[start]])
+        elif kind == "int_const":
+            add_kind(INT_CONST)
+            add_id(NO_ID)
+        elif kind == "open_comment":
+            raise JackSyntaxError("unterminated comment", start,
+                                  LineIndex(source))
+        else:
+            # the offsets of a string constant exclude its quotes
+            add_kind(STRING_CONST)
+            add_id(NO_ID)
+            start += 1
+            pos -= 1
+            add_start(start)
+            add_end(pos)
+            pos += 1
+            continue
+        add_start(start)
+        add_end(pos)
+    return buffer
+
+
+def scan_tokens(source: str, pos: int = 0
+                ) -> typing.Iterator[typing.Tuple[int, int, int, int]]:
+    """Scans source from pos like fill_buffer(), one token at a time.
+
+    Args:
+        source (str): the Jack source to scan.
+        pos (int): the offset to start at, which must not be inside a token
+            or a comment.
+
+    Yields:
+        (token type code, start offset, end offset, interned id), the offsets
+        being those fill_buffer() stores.
+    """
+    match = TOKEN_REGEX.match
+    keyword_id = KEYWORD_IDS.get
+    length = len(source)
+    while pos < length:
+        token = match(source, pos)
+        if token is None:
+            raise JackSyntaxError("invalid token", pos, LineIndex(source))
+        kind = token.lastgroup
+        start, pos = token.span()
+        if kind == "word":
+            ident = keyword_id(token.group())
+            if ident is None:
+                yield IDENTIFIER, start, pos, NO_ID
+            else:
+                yield KEYWORD, start, pos, ident
+        elif kind == "symbol":
+            yield SYMBOL, start, pos, SYMBOL_IDS[source[start]]
+        elif kind == "int_const":
+            yield INT_CONST, start, pos, NO_ID
+        elif kind == "string_const":
+            yield STRING_CONST, start + 1, pos - 1, NO_ID
+        elif kind == "open_comment":
+            raise JackSyntaxError("unterminated comment", start,
+                                  LineIndex(source))
+
+
+def stream_tokens(input_stream: typing.TextIO,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE
+                  ) -> typing.Iterator[typing.Tuple[int, str, int]]:
+    """Reads the input stream in chunks and yields its tokens one by one.
+
+    Only the current chunk and the unfinished token at its end are kept in
+    memory. Comments that cross chunk boundaries are skipped without being
+    kept at all.
+
+    Args:
+        input_stream (typing.TextIO): input stream.
+        chunk_size (int): the number of characters read at a time.
+
+    Yields:
+        (token type code, token text, offset of the token in the source).
+    """
+    match = STREAM_REGEX.match
+    keyword_id = KEYWORD_IDS.get
+    text = ""
+    offset = 0  # the source offset of text[0]
+    closing = None  # the end of a comment that is cut by a chunk boundary
+    opened = -1  # the source offset of the "/*" of such a comment
+    at_eof = False
+    while not at_eof:
+        chunk = input_stream.read(chunk_size)
+        at_eof = not chunk
+        text += chunk
+        length = len(text)
+        pos = 0
+        if closing is not None:
+            end = text.find(closing)
+            if end == -1:
+                if at_eof and closing == "*/":
+                    raise JackSyntaxError("unterminated comment", opened)
+                # keep the last character, it may begin the closing "*/"
+                pos = max(length - 1, 0)
+                offset += pos
+                text = text[pos:]
+                continue
+            pos = end + len(closing)
+            closing = None
+        while pos < length:
+            token = match(text, pos)
+            if token is None:
+                if text[pos] == '"' and not at_eof and \
+                        text.find("\n", pos) == -1:
+                    break
+                raise JackSyntaxError("invalid token", offset + pos)
+            kind = token.lastgroup
+            start, end = token.span()
+            if kind == "skip":
+                if end == length and not at_eof:
+                    if text.startswith("//", start):
+                        closing = "\n"
+                    pos = length
+                    break
+                pos = end
+                continue
+            if kind == "open_comment":
+                # a comment not closed in this chunk, keep only its last
+                # character since it may begin the closing "*/"
+                closing = "*/"
+                opened = offset + start
+                pos = max(start + 2, length - 1)
+                break
+            if end == length and not at_eof:
+                # the token may go on in the next chunk
+                break
+            if kind == "word":
+                ident = keyword_id(token.group())
+                if ident is None:
+                    yield IDENTIFIER, token.group(), offset + start
+                else:
+                    yield KEYWORD, KEYWORD_TABLE[ident], offset + start
+            elif kind == "symbol":
+                yield SYMBOL, text[start], offset + start
+            elif kind == "int_const":
+                yield INT_CONST, token.group(), offset + start
+            else:
+                yield STRING_CONST, text[start + 1:end - 1], offset + start
+            pos = end
+        offset += pos
+        text = text[pos:]
+    if closing == "*/":
+        raise JackSyntaxError("unterminated comment", opened)
+
+
+def legacy_tokens(input_stream: typing.TextIO
+                  ) -> typing.Iterator[typing.Tuple[int, str, int]]:
+    """The original line based scanner. It strips the comments and blank
+    lines first, then matches the tokens at a moving position in each line.
+
+    Args:
+        input_stream (typing.TextIO): input stream.
+
+    Yields:
+        (token type code, token text, -1), source offsets are not known once
+        the comments are stripped.
+    """
+    # Each step replaces the string of the one before, so that only the
+    # lines are left once they are split.
+    input_str = input_stream.read()
+    input_str = re.sub("\/\*[\s\S]*?\*\/|\/\/.*|\/\*\*[\s\S]*?\*\/",'',input_str) #replaces all the comments with empty space.
+    input_str = re.sub("(^\s*\n)|(\s+$)(^\s*\n)|(\s+$)/m","",input_str) #removes the white spaces at the end of line
+    input_lines = re.sub("(\n\s*)+", "\n", input_str).splitlines()
+    # and removes the empty lines with a newline.
+    del input_str
+    # the lines are dropped as they are tokenized, instead of being kept
+    # until the tokenizer is
+    input_lines.reverse()
+    while input_lines:
+        line = input_lines.pop()
+        pos = _LEGACY_SPACE.match(line).end()
+        while pos < len(line):
+            if line[pos] in SYMBOLS:
+                yield SYMBOL, line[pos], -1
+                pos += 1
+            else:
+                for kind, pattern in _LEGACY_PATTERNS:
+                    token = pattern.match(line, pos)
+                    if token is not None:
+                        break
+                else:
+                    raise JackSyntaxError("invalid token: " + line[pos:])
+                text = token.group()
+                if kind == STRING_CONST:
+                    text = text[1:-1]
+                yield kind, text, -1
+                pos = token.end()
+            pos = _LEGACY_SPACE.match(line, pos).end()
+
+
 class JackTokenizer:
     """Removes all comments from the input stream and breaks it
     into Jack language tokens, as specified by the Jack grammar.
@@ -98,27 +372,67 @@ class JackTokenizer:
     """
 
 
-    def __init__(self, input_stream: typing.TextIO) -> None:
+    def __init__(self, input_stream: typing.TextIO,
+                 engine: str = "regex",
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 strict: bool = True) -> None:
         """Opens the input stream and gets ready to tokenize it.
 
         Args:
             input_stream (typing.TextIO): input stream.
+            engine (str): "regex" scans the whole source with TOKEN_REGEX into
+                a TokenBuffer, "stream" reads the input in chunks of
+                chunk_size characters through stream_tokens(), "legacy" is
+                the original line based scanner.
+            chunk_size (int): the chunk size of the "stream" engine.
+            strict (bool): raise a JackSyntaxError once a parse is stuck at
+                the end of the input, see advance(). Otherwise the last token
+                is taken again on every advance.
         """
-        # Your code goes here!
-        # A good place to start is to read all the lines of the input:
-        input_str = input_stream.read()
-        input_str_no_comments = re.sub("\/\*[\s\S]*?\*\/|\/\/.*|\/\*\*[\s\S]*?\*\/",'',input_str) #replaces all the comments with empty space.
-        input_str_clean = re.sub("(^\s*\n)|(\s+$)(^\s*\n)|(\s+$)/m","",input_str_no_comments) #removes the white spaces at the end of line
-        input_str_final = re.sub("(\n\s*)+", "\n", input_str_clean)
-        # and removes the empty lines with a newline.
-        for idx,line in enumerate(input_str_final.split("\n")):
-            print(idx,line)
-        self.input_lines = input_str_final.splitlines()
-        self.i = 0
-        self.token_type_str = None
+        if engine not in ENGINES:
+            raise ValueError("unknown tokenizer engine: " + engine)
+        self.engine = engine
         self.word = None
+        # the type code and interned id of the current token, see TokenBuffer
+        self.kind = None
+        self.ident = NO_ID
+        self.buffer = None
+        self._tokens = None
+        # the position of the current token
+        self.index = -1
+        # the source offset of the current token, when it is not in a buffer
+        self.start = -1
+        self.strict = strict
+        # the advances made past the last token
+        self._overruns = 0
+        if engine == "regex":
+            self.buffer = fill_buffer(input_stream.read())
+            self.advance()
+            return
+        if engine == "stream":
+            self._tokens = stream_tokens(input_stream, chunk_size)
+        else:
+            self._tokens = legacy_tokens(input_stream)
+        # the tokens scanned but not advanced to yet, and the last tokens
+        # advanced over, as (kind, id, text, offset)
+        self._ahead = collections.deque()
+        self._behind = collections.deque(maxlen=RING_SIZE)
         self.advance()
-        pass
+
+    @classmethod
+    def from_buffer(cls, buffer: TokenBuffer, index: int = 0,
+                    strict: bool = True) -> "JackTokenizer":
+        """
+        Returns:
+            JackTokenizer: a "regex" engine tokenizer over tokens that were
+            scanned already, with the index-th token current.
+        """
+        tokenizer = cls(io.StringIO(""), strict=strict)
+        tokenizer.buffer = buffer
+        tokenizer.index = index - 1
+        tokenizer._overruns = 0
+        tokenizer.advance()
+        return tokenizer
 
     def has_more_tokens(self) -> bool:
         """Do we have more tokens in the input?
@@ -126,69 +440,153 @@ class JackTokenizer:
         Returns:
             bool: True if there are more tokens, False otherwise.
         """
-        while self.input_lines[self.i] == '' and self.i < (len(self.input_lines)-1):
-            self.i += 1
-            self.input_lines[self.i] = re.sub("^\s*", "", self.input_lines[self.i])
-
-        if self.i < (len(self.input_lines)-1):
-            #print(self.i)
-            #print(len(self.input_lines))
-            return True
-        return False
+        if self.buffer is not None:
+            return self.index + 1 < len(self.buffer.kinds)
+        return bool(self._ahead) or self._scan()
 
     def advance(self) -> None:
         """Gets the next token from the input and makes it the current token. 
         This method should be called if has_more_tokens() is true. 
         Initially there is no current token.
+
+        Past the last token, the current token stays the last one. A parse
+        makes one such advance, over the "}" closing its class, so a second
+        one means that the input ended in the middle of a class, and raises
+        a JackSyntaxError if the tokenizer is strict.
         """
-        if self.has_more_tokens():         # trick for not do advance in the end of things that done, need to be in tokenizer
-            self.input_lines[self.i] = re.sub("^\s*", "", self.input_lines[self.i])
-            while self.input_lines[self.i] == '':
-                self.i += 1
-                self.input_lines[self.i] = re.sub("^\s*", "", self.input_lines[self.i])
-
-            # print(self.i)
-            # print(self.word)
-            print(self.token_type_str, 'the keyword = ', self.word)
-            # Handaling symbols
-            if self.input_lines[self.i][0] in SYMBOLS:
-                self.token_type_str = "symbol"
-                self.word = self.input_lines[self.i][0]
-                self.input_lines[self.i] = self.input_lines[self.i][1:]
-                return
-
-            # Handaling keywords
-            find_keyword_at_start_regex = r'^(' + KEYWORD_REGEX + r')(?=(' + SYMBOL_REGEX + r'|\s+))'
-            keyword_at_start = re.search(find_keyword_at_start_regex, self.input_lines[self.i])
-            keyword_bool = not (keyword_at_start is None)
-            if keyword_bool:
-                self.set_according_to_regex("keyword", keyword_at_start.group(0).lower(), find_keyword_at_start_regex)
-                return
-
-            find_numbers_at_start_regex = r'^(' + '[0-9]+' + r')(?=(' + SYMBOL_REGEX + r'|\s+))'
-            number_at_start = re.search(find_numbers_at_start_regex, self.input_lines[self.i])
-            number_bool = not (number_at_start is None)
-            if number_bool:
-                self.set_according_to_regex("int_const", number_at_start.group(0), find_numbers_at_start_regex)
-                return
-            find_double_quotes_regex = '^(")(.+)(")'
-            quotes_at_start = re.search(find_double_quotes_regex, self.input_lines[self.i])
-            quote_bool = not (quotes_at_start is None)
-            if quote_bool:
-                self.set_according_to_regex("string_const", quotes_at_start.group(0)[1:-1], find_double_quotes_regex)
-                return
-            find_Identifier_regex = '^([A-Z]|[a-z]|_|[0-9])+'
-            Identifier_at_start = re.search(find_Identifier_regex, self.input_lines[self.i])
-            Identifier_bool = not (Identifier_at_start is None)
-            if Identifier_bool:
-                self.set_according_to_regex("identifier", Identifier_at_start.group(0), find_Identifier_regex)
-                return
-            return Exception()
-        # Your code goes here!
-    def set_according_to_regex(self, token_type_string, word_string, start_regex):
-        self.token_type_str = token_type_string
-        self.word = word_string
-        self.input_lines[self.i] = re.sub(start_regex, '', self.input_lines[self.i])
+        buffer = self.buffer
+        if buffer is not None:
+            index = self.index + 1
+            if index < len(buffer.kinds):
+                self.index = index
+                self.kind = buffer.kinds[index]
+                self.ident = buffer.ids[index]
+            else:
+                self._overrun()
+            return
+        if not self._ahead and not self._scan():
+            self._overrun()
+            return
+        if self.kind is not None:
+            self._behind.append((self.kind, self.ident, self.word,
+                                 self.start))
+        self.kind, self.ident, self.word, self.start = self._ahead.popleft()
+        self.index += 1
+
+    def past_end(self) -> bool:
+        """
+        Returns:
+            bool: True once advance() was called past the last token, which
+            a parse that took every token does after it.
+        """
+        return self._overruns > 0
+
+    def _overrun(self) -> None:
+        if self._overruns and self.strict and self.kind is not None:
+            raise self.error("unexpected end of input after " +
+                             repr(self.current_word()))
+        self._overruns += 1
+
+    def _scan(self) -> bool:
+        """Scans one more token into the lookahead.
+
+        Returns:
+            bool: False at the end of the input.
+        """
+        token = next(self._tokens, None)
+        if token is None:
+            return False
+        kind, word, offset = token
+        if kind <= SYMBOL:
+            # the shared copy of the keyword or symbol, not the scanned one
+            ident = INTERNED_IDS[word]
+            self._ahead.append((kind, ident, INTERNED[ident], offset))
+        else:
+            self._ahead.append((kind, NO_ID, word, offset))
+        return True
+
+    def peek(self, k: int = 1) -> typing.Tuple[typing.Optional[int], int]:
+        """Looks at a following token without advancing to it.
+
+        Args:
+            k (int): 1 for the token after the current one, 2 for the one
+                after it, and so on up to RING_SIZE.
+
+        Returns:
+            the type code and interned id of that token, (None, NO_ID) past
+            the end of the input.
+        """
+        if not 0 < k <= RING_SIZE:
+            raise ValueError("can only peek 1 to " + str(RING_SIZE) +
+                             " tokens ahead")
+        buffer = self.buffer
+        if buffer is not None:
+            index = self.index + k
+            if index < len(buffer.kinds):
+                return buffer.kinds[index], buffer.ids[index]
+            return None, NO_ID
+        while len(self._ahead) < k:
+            if not self._scan():
+                return None, NO_ID
+        kind, ident, _, _ = self._ahead[k - 1]
+        return kind, ident
+
+    def mark(self) -> int:
+        """
+        Returns:
+            int: the position of the current token, to go back to with
+            reset().
+        """
+        return self.index
+
+    def reset(self, mark: int) -> None:
+        """Makes the token at a position returned by mark() the current token
+        again. Unless the "regex" engine is used, only the last RING_SIZE
+        tokens can be gone back to.
+        """
+        if self.buffer is not None:
+            if not 0 <= mark <= self.index:
+                raise ValueError("invalid mark: " + str(mark))
+            self.index = mark
+            self.kind = self.buffer.kinds[mark]
+            self.ident = self.buffer.ids[mark]
+            self._overruns = 0
+            return
+        steps = self.index - mark
+        if not 0 <= steps <= len(self._behind):
+            raise ValueError("cannot go back " + str(steps) + " tokens")
+        for _ in range(steps):
+            self._ahead.appendleft((self.kind, self.ident, self.word,
+                                    self.start))
+            self.kind, self.ident, self.word, self.start = self._behind.pop()
+        self.index = mark
+        self._overruns = 0
+
+    def token_offset(self) -> int:
+        """
+        Returns:
+            int: the source offset of the current token, at the opening
+            quote of a string constant, -1 if it is not known, as with the
+            "legacy" engine.
+        """
+        if self.buffer is not None:
+            if self.index < 0:
+                return -1
+            start = self.buffer.starts[self.index]
+            return start - 1 if self.kind == STRING_CONST else start
+        return self.start
+
+    def error(self, message: str) -> JackSyntaxError:
+        """
+        Returns:
+            JackSyntaxError: an error at the current token. Its line and
+            column are known if the "regex" engine is used, which keeps the
+            source, see JackSyntaxError.locate() otherwise.
+        """
+        lines = None
+        if self.buffer is not None:
+            lines = LineIndex(self.buffer.source)
+        return JackSyntaxError(message, self.token_offset(), lines)
 
     def token_type(self) -> str:
         """
@@ -196,8 +594,35 @@ class JackTokenizer:
             str: the type of the current token, can be
             "KEYWORD", "SYMBOL", "IDENTIFIER", "INT_CONST", "STRING_CONST"
         """
+        if self.kind is None:
+            return None
+        return TOKEN_TYPE_NAMES[self.kind]
+
+    def token_kind(self) -> int:
+        """
+        Returns:
+            int: the type code of the current token, one of the KEYWORD,
+            SYMBOL, INT_CONST, STRING_CONST and IDENTIFIER constants.
+        """
+        return self.kind
 
-        return self.token_type_str
+    def token_id(self) -> int:
+        """
+        Returns:
+            int: the interned id of the current token if it is a keyword or a
+            symbol, one of the K_* and S_* constants, NO_ID otherwise.
+        """
+        return self.ident
+
+    def current_word(self) -> str:
+        """
+        Returns:
+            str: the text of the current token, read lazily from the buffer
+            when the regex engine is used.
+        """
+        if self.buffer is not None:
+            return self.buffer.lexeme(self.index)
+        return self.word
 
     def keyword(self) -> str:
         """
@@ -208,7 +633,7 @@ class JackTokenizer:
             "BOOLEAN", "CHAR", "VOID", "VAR", "STATIC", "FIELD", "LET", "DO", 
             "IF", "ELSE", "WHILE", "RETURN", "TRUE", "FALSE", "NULL", "THIS"
         """
-        return self.word
+        return self.current_word()
 
     def symbol(self) -> str:
         """
@@ -220,14 +645,8 @@ class JackTokenizer:
               '-' | '*' | '/' | '&' | '|' | '<' | '>' | '=' | '~' | '^' | '#'
         """
         # Your code goes here!
-        # returns >, <, and & as &gt, &lt, and &amp.
-        if self.word == '<':
-            return '&lt;'
-        elif self.word == '>':
-            return '&gt;'
-        elif self.word == '&':
-            return '&amp;'
-        return self.word
+        # XML escaping is done by the XmlEmitter.
+        return self.current_word()
 
     def identifier(self) -> str:
         """
@@ -238,9 +657,13 @@ class JackTokenizer:
             identifier: A sequence of letters, digits, and underscore ('_') not 
                   starting with a digit. You can assume keywords cannot be
                   identifiers, so 'self' cannot be an identifier, etc'.
+            Identifiers are interned in the table sys.intern() shares across
+            the process, so that every use of a name, in any file, is one
+            string for as long as anything refers to it. Keywords and
+            symbols are always the strings of TokenBuffer.INTERNED.
         """
         # Your code goes here!
-        return self.word
+        return intern(self.current_word())
 
     def int_val(self) -> int:
         """
@@ -251,7 +674,7 @@ class JackTokenizer:
             integerConstant: A decimal number in the range 0-32767.
         """
         # Your code goes here!
-        return self.word
+        return self.current_word()
 
     def string_val(self) -> str:
         """
@@ -263,4 +686,4 @@ class JackTokenizer:
                       double quote or newline '"'
         """
         # Your code goes here!
-        return self.word
+        return self.current_word()
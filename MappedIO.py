@@ -0,0 +1,100 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import codecs
+import mmap
+import os
+import typing
+
+# "text" goes through open() in text mode, "mmap" through this module.
+IO_MODES = ("text", "mmap")
+# The XML of a file is about 11 times the size of its source, see the
+# benchmarks. The output buffer is allocated that large up front.
+OUTPUT_SIZE_RATIO = 12
+
+
+def read_source(input_path: str) -> str:
+    """Reads a Jack file through a memory map, decoding it straight from
+    the mapped pages. Jack is ASCII, so the file is decoded as such, with
+    UTF-8 as the fallback for string constants and comments that are not.
+    Newlines are translated as text mode would.
+
+    Returns:
+        str: the source of the file.
+    """
+    fd = os.open(input_path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if not size:
+            return ""
+        with mmap.mmap(fd, size, access=mmap.ACCESS_READ) as mapped:
+            try:
+                source = codecs.ascii_decode(mapped)[0]
+            except UnicodeDecodeError:
+                source = codecs.utf_8_decode(mapped, "strict", True)[0]
+    finally:
+        os.close(fd)
+    if "\r" in source:
+        source = source.replace("\r\n", "\n").replace("\r", "\n")
+    return source
+
+
+class SourceStream:
+    """The read() of a text stream over a string that is already in
+    memory, without the copy an io.StringIO makes of it.
+    """
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self.pos = 0
+
+    def read(self, size: int = -1) -> str:
+        start = self.pos
+        if size is None or size < 0:
+            self.pos = len(self.source)
+        else:
+            self.pos = min(len(self.source), start + size)
+        return self.source[start:self.pos]
+
+
+class OutputBuffer:
+    """A stream collecting everything written to it in one bytearray,
+    which write_file() writes out with a single os.write(). Text is written
+    encoded, bytes as they are.
+    """
+
+    def __init__(self, size_hint: int = 0) -> None:
+        """
+        :param size_hint: the expected size of the output in bytes, the
+            buffer is allocated that large and only grows past it.
+        """
+        self.data = bytearray(size_hint)
+        self.length = 0
+
+    def write(self, text: typing.Union[str, bytes]) -> int:
+        encoded = text.encode() if type(text) is str else text
+        end = self.length + len(encoded)
+        self.data[self.length:end] = encoded
+        self.length = end
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+    def getvalue(self) -> bytes:
+        return bytes(self.data[:self.length])
+
+    def write_file(self, output_path: str) -> None:
+        """Writes the output to output_path, replacing its contents."""
+        fd = os.open(output_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                     0o666)
+        try:
+            view = memoryview(self.data)[:self.length]
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
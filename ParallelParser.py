@@ -0,0 +1,192 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import concurrent.futures
+import io
+import os
+import typing
+from CompilationEngine import CompilationEngine
+from JackTokenizer import JackTokenizer, scan_tokens
+from MappedIO import SourceStream
+from SymbolIndex import SUBROUTINE_KEYWORDS, skip_body
+from TokenBuffer import S_LBRACE, S_RBRACE
+from XmlEmitter import XmlEmitter
+
+# Sources shorter than this are parsed in this process, where sending the
+# work to the pool would cost more than it saves.
+MIN_PARALLEL_SIZE = 1 << 16
+# Runs of subroutines sent to the workers per worker, so that uneven runs
+# even out.
+CHUNKS_PER_WORKER = 4
+
+
+def find_subroutines(source: str) -> typing.Optional[
+        typing.List[typing.Tuple[int, int]]]:
+    """Finds the subroutines of a class by matching the braces of their
+    bodies, scanning only the tokens outside of them.
+
+    Returns:
+        the (start, end) offsets of every subroutine declaration, from its
+        first keyword to the "}" closing its body, or None if source is not
+        a single class whose subroutines end it.
+
+    Raises:
+        ValueError: if a body is not closed, or holds an invalid character.
+    """
+    spans = []
+    tokens = scan_tokens(source)
+    for token in tokens:
+        if token[3] in SUBROUTINE_KEYWORDS:
+            break
+    else:
+        return None
+    while token[3] in SUBROUTINE_KEYWORDS:
+        start = token[1]
+        for token in tokens:
+            if token[3] == S_LBRACE:
+                break
+        else:
+            return None
+        end = skip_body(source, token[2])
+        spans.append((start, end))
+        tokens = scan_tokens(source, end)
+        token = next(tokens, None)
+        if token is None:
+            return None
+    if token[3] != S_RBRACE or next(tokens, None) is not None:
+        return None
+    return spans
+
+
+def parse_subroutines(text: str, indent: int = 0) -> str:
+    """Parses a run of subroutine declarations, as the worker processes do.
+
+    Args:
+        text (str): the source of the declarations.
+        indent (int): the number of spaces to indent the output by per level.
+
+    Returns:
+        str: their XML, indented as inside a class.
+
+    Raises:
+        ValueError: if text is not made of whole subroutine declarations.
+    """
+    # the "}" closing the class, where the parse has to stop
+    tokenizer = JackTokenizer(SourceStream(text + "\n}"))
+    output = io.StringIO()
+    emitter = XmlEmitter(output, indent)
+    emitter.depth = 1
+    CompilationEngine(tokenizer, None, indent, emitter)
+    # a declaration that took the "}" as its own went on past it
+    if tokenizer.past_end() or \
+            tokenizer.index != len(tokenizer.buffer) - 1 or \
+            tokenizer.token_id() != S_RBRACE:
+        raise ValueError("not a run of subroutine declarations")
+    return output.getvalue()
+
+
+def _parse_class(source: str, indent: int) -> str:
+    output = io.StringIO()
+    tokenizer = JackTokenizer(SourceStream(source))
+    CompilationEngine(tokenizer, output, indent)
+    if not tokenizer.past_end():
+        raise ValueError("unexpected tokens after the class")
+    return output.getvalue()
+
+
+def _split(spans: typing.List[typing.Tuple[int, int]],
+           chunks: int) -> typing.List[typing.Tuple[int, int]]:
+    """Groups consecutive spans into about chunks runs of similar length.
+
+    Returns:
+        the (start, end) offsets of every run.
+    """
+    size = (spans[-1][1] - spans[0][0]) / chunks
+    runs = []
+    start = None
+    for span_start, end in spans:
+        if start is None:
+            start = span_start
+        if end - start >= size:
+            runs.append((start, end))
+            start = None
+    if start is not None:
+        runs.append((start, spans[-1][1]))
+    return runs
+
+
+class SubroutinePool:
+    """A pool of worker processes parsing the subroutines of one class in
+    parallel, for files too large to wait for on a single core.
+    """
+
+    def __init__(self, jobs: typing.Optional[int] = None) -> None:
+        """
+        :param jobs: the number of worker processes, the number of CPUs by
+            default.
+        """
+        self.jobs = jobs or os.cpu_count() or 1
+        self.executor = concurrent.futures.ProcessPoolExecutor(self.jobs)
+
+    def __enter__(self) -> "SubroutinePool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    def analyze(self, source: str, output_stream: typing.TextIO,
+                indent: int = 0) -> bool:
+        """Writes the XML of source, the same as analyze_file does, with the
+        subroutines parsed on the workers. The class header and variables
+        are parsed here while they do, and the runs of subroutines are
+        written back in source order.
+
+        Args:
+            source (str): the Jack source of a class.
+            output_stream (typing.TextIO): the stream the XML is written to.
+            indent (int): the number of spaces to indent the output by per
+                level.
+
+        Returns:
+            bool: False, with nothing written, if source is too small to be
+            worth it or the pre-scan or a worker did not find a plain class,
+            which is left to analyze_file so that its errors are the same.
+        """
+        if len(source) < MIN_PARALLEL_SIZE or self.jobs <= 1:
+            return False
+        try:
+            spans = find_subroutines(source)
+        except ValueError:
+            return False
+        if not spans or len(spans) < 2:
+            return False
+        runs = _split(spans, self.jobs * CHUNKS_PER_WORKER)
+        futures = [self.executor.submit(parse_subroutines,
+                                        source[start:end], indent)
+                   for start, end in runs]
+        try:
+            # the class without its subroutines, which are put back before
+            # the "}" closing it
+            head = _parse_class(source[:spans[0][0]] + source[spans[-1][1]:],
+                                indent)
+            tail = " " * indent + "<symbol> } </symbol>\n</class>\n"
+            if not head.endswith(tail):
+                return False
+            parts = [future.result() for future in futures]
+        except Exception:
+            return False
+        finally:
+            for future in futures:
+                future.cancel()
+        output_stream.write(head[:-len(tail)])
+        for part in parts:
+            output_stream.write(part)
+        output_stream.write(tail)
+        return True
@@ -0,0 +1,239 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+
+MAX_CONSTANT = 32767
+
+# Folds of the commands applied to constants, on 16-bit two's complement
+# words. None means the result is not known for these operands: lt and gt
+# are left alone when the subtraction the VM translator compares with could
+# overflow, and Math.divide is only folded the way the OS divides positive
+# numbers. Math.multiply and Math.divide are assumed to be the OS ones.
+UNARY_FOLDS = {
+    "neg": lambda x: -x,
+    "not": lambda x: ~x,
+}
+BINARY_FOLDS = {
+    "add": lambda x, y: x + y,
+    "sub": lambda x, y: x - y,
+    "and": lambda x, y: x & y,
+    "or": lambda x, y: x | y,
+    "eq": lambda x, y: -(x == y),
+    "lt": lambda x, y: -(x < y) if _fits(x - y) else None,
+    "gt": lambda x, y: -(x > y) if _fits(x - y) else None,
+    "Math.multiply": lambda x, y: x * y,
+    "Math.divide": lambda x, y: x // y if x >= 0 and y > 0 else None,
+}
+
+
+def _fits(value: int) -> bool:
+    return -32768 <= value <= 32767
+
+
+def to_word(value: int) -> int:
+    """
+    Returns:
+        int: value wrapped to a signed 16-bit word.
+    """
+    return (value + 32768) % 65536 - 32768
+
+
+def push_value(value: int) -> typing.Optional[typing.List[tuple]]:
+    """
+    Returns:
+        the shortest commands pushing value, None for -32768, which takes
+        more than a constant.
+    """
+    if value >= 0:
+        return [("push", "constant", value)]
+    if value == -32768:
+        return None
+    return [("push", "constant", -value), ("neg",)]
+
+
+def instruction_count(commands: typing.Iterable[tuple]) -> int:
+    """
+    Returns:
+        int: the number of commands, not counting labels, which do not
+        execute.
+    """
+    return sum(1 for command in commands if command[0] != "label")
+
+
+def optimize(commands: typing.List[tuple]) -> typing.List[tuple]:
+    """Runs every pass over the commands of each function until none of
+    them changes anything:
+
+    - push x / pop x pairs, and pairs of not or of neg, are removed.
+    - Arithmetic, comparisons and Math.multiply/divide calls on constants
+      are folded into the constant they compute.
+    - An if-goto on a constant becomes a goto or goes away.
+    - Jumps to a label that leads to a goto go straight to its target, and
+      a goto to a return becomes the return.
+    - Gotos to the next command, code after a goto or return that no label
+      leads to, and labels nothing jumps to are removed.
+
+    Args:
+        commands (typing.List[tuple]): VM commands as VMWriter keeps them.
+
+    Returns:
+        typing.List[tuple]: the optimized commands.
+    """
+    starts = [i for i, command in enumerate(commands)
+              if command[0] == "function"]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    optimized = []
+    for start, end in zip(starts, starts[1:] + [len(commands)]):
+        body = commands[start:end]
+        while True:
+            new_body = _remove_dead_code(_thread_jumps(_fold(body)))
+            if new_body == body:
+                break
+            body = new_body
+        optimized.extend(body)
+    return optimized
+
+
+def _fold(commands: typing.List[tuple]) -> typing.List[tuple]:
+    """The pass rewriting short runs of commands, as they are added."""
+    out = []
+    for command in commands:
+        out.append(command)
+        while _rewrite_tail(out):
+            pass
+    return out
+
+
+def _constant(out: typing.List[tuple],
+              end: int) -> typing.Optional[typing.Tuple[int, int]]:
+    """
+    Returns:
+        the value pushed by the commands ending just before end and the
+        index of the first of them, if they push a constant.
+    """
+    if end >= 1 and out[end - 1][:2] == ("push", "constant"):
+        return out[end - 1][2], end - 1
+    if end >= 2 and out[end - 2][:2] == ("push", "constant") and \
+            out[end - 1][0] in UNARY_FOLDS:
+        return to_word(UNARY_FOLDS[out[end - 1][0]](out[end - 2][2])), end - 2
+    return None
+
+
+def _rewrite_tail(out: typing.List[tuple]) -> bool:
+    """Rewrites the last commands of out in place.
+
+    Returns:
+        bool: whether anything was rewritten.
+    """
+    last = out[-1]
+    operation = last[0]
+    end = len(out) - 1
+    if end and (operation == "pop" and out[-2] == ("push",) + last[1:] or
+                operation in UNARY_FOLDS and out[-2] == last):
+        del out[-2:]
+        return True
+    if operation == "if-goto":
+        constant = _constant(out, end)
+        if constant is None:
+            return False
+        value, start = constant
+        out[start:] = [("goto", last[1])] if value else []
+        return True
+    if operation == "call" and last[2] == 2:
+        operation = last[1]
+    if operation in UNARY_FOLDS:
+        constant = _constant(out, end)
+        if constant is None:
+            return False
+        value, start = constant
+        result = UNARY_FOLDS[operation](value)
+    elif operation in BINARY_FOLDS:
+        right = _constant(out, end)
+        left = right and _constant(out, right[1])
+        if not left:
+            return False
+        start = left[1]
+        result = BINARY_FOLDS[operation](left[0], right[0])
+        if result is None:
+            return False
+    else:
+        return False
+    replacement = push_value(to_word(result))
+    if replacement is None or len(replacement) >= len(out) - start:
+        return False
+    out[start:] = replacement
+    return True
+
+
+def _thread_jumps(commands: typing.List[tuple]) -> typing.List[tuple]:
+    """The pass sending jumps straight to where their label leads."""
+    # label -> the first command after it that is not a label
+    following = {}
+    pending = []
+    for command in commands:
+        if command[0] == "label":
+            pending.append(command[1])
+            continue
+        for label in pending:
+            following[label] = command
+        pending = []
+
+    def resolve(label: str) -> str:
+        seen = set()
+        while label not in seen:
+            seen.add(label)
+            target = following.get(label)
+            if target is None or target[0] != "goto":
+                break
+            label = target[1]
+        return label
+
+    out = []
+    for command in commands:
+        if command[0] in ("goto", "if-goto"):
+            label = resolve(command[1])
+            if command[0] == "goto" and following.get(label) == ("return",):
+                command = ("return",)
+            else:
+                command = (command[0], label)
+        out.append(command)
+    return out
+
+
+def _remove_dead_code(commands: typing.List[tuple]) -> typing.List[tuple]:
+    """The pass removing unreachable code, useless gotos and unused
+    labels.
+    """
+    reachable = []
+    live = True
+    for command in commands:
+        if command[0] == "label":
+            live = True
+        elif not live:
+            continue
+        reachable.append(command)
+        if command[0] in ("goto", "return"):
+            live = False
+    out = []
+    for i, command in enumerate(reachable):
+        if command[0] == "goto":
+            j = i + 1
+            while j < len(reachable) and reachable[j][0] == "label":
+                if reachable[j][1] == command[1]:
+                    break
+                j += 1
+            else:
+                j = None
+            if j is not None:
+                continue
+        out.append(command)
+    used = {command[1] for command in out
+            if command[0] in ("goto", "if-goto")}
+    return [command for command in out
+            if command[0] != "label" or command[1] in used]
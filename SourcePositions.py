@@ -0,0 +1,97 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import bisect
+import typing
+from array import array
+
+
+class LineIndex:
+    """Maps offsets into a source to lines and columns. Tokens only keep
+    their offsets, the newlines of the source are found the first time a
+    position is asked for, which is when a diagnostic is reported.
+    """
+
+    __slots__ = ("source", "_newlines")
+
+    def __init__(self, source: str) -> None:
+        """
+        :param source: the text the offsets point into.
+        """
+        self.source = source
+        self._newlines = None
+
+    def newlines(self) -> array:
+        """
+        Returns:
+            array: the offset of every newline of the source, in order.
+        """
+        if self._newlines is None:
+            newlines = array('L')
+            find = self.source.find
+            pos = find("\n")
+            while pos != -1:
+                newlines.append(pos)
+                pos = find("\n", pos + 1)
+            self._newlines = newlines
+        return self._newlines
+
+    def position(self, offset: int) -> typing.Tuple[int, int]:
+        """
+        Returns:
+            (line, column) of offset, both counted from 1.
+        """
+        newlines = self.newlines()
+        line = bisect.bisect_left(newlines, offset)
+        line_start = newlines[line - 1] + 1 if line else 0
+        return line + 1, offset - line_start + 1
+
+
+class JackSyntaxError(ValueError):
+    """An error in a Jack source, at a source offset that is only turned
+    into a line and a column when the error is printed.
+    """
+
+    def __init__(self, message: str, offset: int = -1,
+                 lines: typing.Optional[LineIndex] = None) -> None:
+        """
+        :param message: what is wrong.
+        :param offset: where in the source, -1 if it is not known.
+        :param lines: the LineIndex of the source, see locate().
+        """
+        super().__init__(message)
+        self.message = message
+        self.offset = offset
+        self.lines = lines
+
+    def __reduce__(self) -> tuple:
+        # sent between processes without the source, see locate()
+        return type(self), (self.message, self.offset)
+
+    def locate(self, source: str) -> None:
+        """Gives the source, if the error was raised without it, such as by
+        a tokenizer that does not keep the whole source.
+        """
+        if self.lines is None:
+            self.lines = LineIndex(source)
+
+    def position(self) -> typing.Optional[typing.Tuple[int, int]]:
+        """
+        Returns:
+            (line, column) of the error, None if it is not known.
+        """
+        if self.offset < 0 or self.lines is None:
+            return None
+        return self.lines.position(self.offset)
+
+    def __str__(self) -> str:
+        position = self.position()
+        if position is not None:
+            return "line %d, column %d: %s" % (position + (self.message,))
+        if self.offset >= 0:
+            return self.message + " at offset " + str(self.offset)
+        return self.message
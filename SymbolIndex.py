@@ -0,0 +1,323 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import typing
+from BuildCache import default_cache_dir
+from JackTokenizer import scan_tokens
+from TokenBuffer import (
+    IDENTIFIER, K_CLASS, K_CONSTRUCTOR, K_FIELD, K_FUNCTION, K_METHOD,
+    K_STATIC, S_COMMA, S_LBRACE, S_RPAREN)
+
+# bumped whenever the on-disk format changes, older indexes are rebuilt
+INDEX_VERSION = 1
+CLASS_VAR_KEYWORDS = (K_STATIC, K_FIELD)
+SUBROUTINE_KEYWORDS = (K_CONSTRUCTOR, K_FUNCTION, K_METHOD)
+# Everything in a subroutine body up to its next brace: runs of other
+# characters, string constants and comments, which may hold braces, and a
+# "/" that does not start a comment.
+BODY_REGEX = re.compile(
+    r'''(?:[^{}"/]+|"[^"\n]*"|//[^\n]*|/\*[\s\S]*?\*/|/)*''')
+
+
+class ClassVar(typing.NamedTuple):
+    """A static or field declared by a class."""
+    kind: str
+    type: str
+    name: str
+    offset: int
+
+
+class Subroutine(typing.NamedTuple):
+    """The signature of a constructor, function or method."""
+    kind: str
+    return_type: str
+    name: str
+    # (type, name) of every parameter
+    parameters: typing.Tuple[typing.Tuple[str, str], ...]
+    offset: int
+
+
+class ClassSymbols(typing.NamedTuple):
+    """The declarations of one class. Offsets are those of the names in the
+    source of the file at path.
+    """
+    name: str
+    path: str
+    offset: int
+    variables: typing.Dict[str, ClassVar]
+    subroutines: typing.Dict[str, Subroutine]
+
+
+def skip_body(source: str, pos: int) -> int:
+    """Skips a subroutine body without scanning its tokens.
+
+    Args:
+        source (str): the Jack source.
+        pos (int): the offset just after the opening "{" of the body.
+
+    Returns:
+        int: the offset just after the matching "}".
+    """
+    match = BODY_REGEX.match
+    depth = 1
+    while depth:
+        pos = match(source, pos).end()
+        if pos == len(source):
+            raise ValueError("unexpected end of class")
+        if source[pos] == "{":
+            depth += 1
+        elif source[pos] == "}":
+            depth -= 1
+        else:
+            raise ValueError("invalid token at offset " + str(pos))
+        pos += 1
+    return pos
+
+
+def read_class(source: str, path: str = "") -> ClassSymbols:
+    """Reads the declarations of a class, scanning only the tokens outside
+    of subroutine bodies.
+
+    Raises:
+        ValueError: if source does not hold a class.
+    """
+    tokens = scan_tokens(source)
+
+    def text(token: typing.Tuple[int, int, int, int]) -> str:
+        return source[token[1]:token[2]]
+
+    variables = {}
+    subroutines = {}
+    try:
+        keyword, name = next(tokens), next(tokens)
+        if keyword[3] != K_CLASS or name[0] != IDENTIFIER:
+            raise ValueError("not a class")
+        next(tokens)
+        token = next(tokens)
+        while token[3] in CLASS_VAR_KEYWORDS:
+            kind, var_type = text(token), text(next(tokens))
+            while True:
+                token = next(tokens)
+                variables[text(token)] = ClassVar(kind, var_type, text(token),
+                                                  token[1])
+                if next(tokens)[3] != S_COMMA:
+                    break
+            token = next(tokens)
+        while token[3] in SUBROUTINE_KEYWORDS:
+            kind, return_type = text(token), text(next(tokens))
+            subroutine_name = next(tokens)
+            next(tokens)
+            parameters = []
+            token = next(tokens)
+            while token[3] != S_RPAREN:
+                parameters.append((text(token), text(next(tokens))))
+                token = next(tokens)
+                if token[3] == S_COMMA:
+                    token = next(tokens)
+            brace = next(tokens)
+            if brace[3] != S_LBRACE:
+                raise ValueError("expected a subroutine body at offset " +
+                                 str(brace[1]))
+            tokens = scan_tokens(source, skip_body(source, brace[2]))
+            subroutines[text(subroutine_name)] = Subroutine(
+                kind, return_type, text(subroutine_name), tuple(parameters),
+                subroutine_name[1])
+            token = next(tokens)
+    except StopIteration:
+        raise ValueError("unexpected end of class") from None
+    return ClassSymbols(text(name), path, name[1], variables, subroutines)
+
+
+def default_index_path(root: str) -> str:
+    """
+    Returns:
+        str: the index of the project at root, kept in the cache directory.
+    """
+    digest = hashlib.sha256(os.path.abspath(root).encode()).hexdigest()
+    return os.path.join(default_cache_dir(), "index", digest[:16] + ".json")
+
+
+class SymbolIndex:
+    """The classes, class variables and subroutine signatures of a set of
+    Jack files, looked up by name without parsing anything.
+
+    Files are only read again when their modification time or size changes.
+    The index is saved as compact JSON, one entry per file:
+    path -> [mtime_ns, size, [class name, offset, variables, subroutines]],
+    with variables as [kind, type, name, offset] and subroutines as
+    [kind, return type, name, offset, [[type, name], ...]].
+    """
+
+    def __init__(self) -> None:
+        # path -> (mtime_ns, size, ClassSymbols or None)
+        self.files = {}
+        self.classes = {}
+        # class name -> the paths declaring it, the first in path order is
+        # the one looked up
+        self._declaring = {}
+
+    @classmethod
+    def load(cls, index_path: str) -> "SymbolIndex":
+        """
+        Returns:
+            SymbolIndex: the index saved at index_path, or an empty one if
+            there is none or it has an older format.
+        """
+        index = cls()
+        try:
+            with open(index_path, 'r') as index_file:
+                data = json.load(index_file)
+        except (FileNotFoundError, ValueError):
+            return index
+        if data.get("version") != INDEX_VERSION:
+            return index
+        for path, (mtime, size, entry) in data["files"].items():
+            symbols = None
+            if entry is not None:
+                name, offset, variables, subroutines = entry
+                symbols = ClassSymbols(
+                    name, path, offset,
+                    {var[2]: ClassVar(*var) for var in variables},
+                    {sub[2]: Subroutine(sub[0], sub[1], sub[2],
+                                        tuple(map(tuple, sub[4])), sub[3])
+                     for sub in subroutines})
+            index._add(path, mtime, size, symbols)
+        return index
+
+    def save(self, index_path: str) -> None:
+        """Writes the index to index_path, replacing it atomically."""
+        files = {}
+        for path, (mtime, size, symbols) in self.files.items():
+            entry = None
+            if symbols is not None:
+                entry = [symbols.name, symbols.offset,
+                         [list(var) for var in symbols.variables.values()],
+                         [[sub.kind, sub.return_type, sub.name, sub.offset,
+                           [list(parameter) for parameter in sub.parameters]]
+                          for sub in symbols.subroutines.values()]]
+            files[path] = [mtime, size, entry]
+        directory = os.path.dirname(os.path.abspath(index_path))
+        os.makedirs(directory, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(handle, 'w') as index_file:
+                json.dump({"version": INDEX_VERSION, "files": files},
+                          index_file, separators=(",", ":"))
+            os.replace(temp_path, index_path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    def update(self, input_paths: typing.Iterable[str]) -> typing.Dict[
+            str, str]:
+        """Brings the index up to date with input_paths, the complete set of
+        indexed files. New and changed files are read, files that are no
+        longer among them are dropped.
+
+        Returns:
+            typing.Dict[str, str]: the error message of every file that does
+            not hold a class.
+        """
+        errors = {}
+        seen = set()
+        for input_path in input_paths:
+            path = os.path.abspath(input_path)
+            seen.add(path)
+            stat = os.stat(path)
+            old = self.files.get(path)
+            if old is not None and old[:2] == (stat.st_mtime_ns,
+                                               stat.st_size):
+                continue
+            self._remove(path)
+            with open(path, 'r') as input_file:
+                source = input_file.read()
+            try:
+                symbols = read_class(source, path)
+            except ValueError as error:
+                errors[path] = str(error)
+                symbols = None
+            self._add(path, stat.st_mtime_ns, stat.st_size, symbols)
+        for path in [path for path in self.files if path not in seen]:
+            self._remove(path)
+        return errors
+
+    def lookup_class(self, name: str) -> typing.Optional[ClassSymbols]:
+        return self.classes.get(name)
+
+    def lookup_subroutine(self, class_name: str,
+                          name: str) -> typing.Optional[Subroutine]:
+        symbols = self.classes.get(class_name)
+        return None if symbols is None else symbols.subroutines.get(name)
+
+    def lookup_variable(self, class_name: str,
+                        name: str) -> typing.Optional[ClassVar]:
+        symbols = self.classes.get(class_name)
+        return None if symbols is None else symbols.variables.get(name)
+
+    def _add(self, path: str, mtime: int, size: int,
+             symbols: typing.Optional[ClassSymbols]) -> None:
+        self.files[path] = (mtime, size, symbols)
+        if symbols is None:
+            return
+        paths = self._declaring.setdefault(symbols.name, set())
+        paths.add(path)
+        if path == min(paths):
+            self.classes[symbols.name] = symbols
+
+    def _remove(self, path: str) -> None:
+        entry = self.files.pop(path, None)
+        if entry is None or entry[2] is None:
+            return
+        name = entry[2].name
+        paths = self._declaring[name]
+        paths.discard(path)
+        if not paths:
+            del self._declaring[name]
+            del self.classes[name]
+        elif self.classes[name].path == path:
+            self.classes[name] = self.files[min(paths)][2]
+
+
+if "__main__" == __name__:
+    from JackAnalyzer import find_jack_files
+    parser = argparse.ArgumentParser(
+        prog="SymbolIndex",
+        usage="SymbolIndex <input path> [--index FILE] [--query NAME ...]")
+    parser.add_argument("input_path")
+    parser.add_argument("--index",
+                        help="the index file, kept in the cache directory "
+                             "by default")
+    parser.add_argument("--query", nargs="+", default=[], metavar="NAME",
+                        help="print a class, or Class.name for one of its "
+                             "subroutines or variables")
+    args = parser.parse_args()
+    index_path = args.index or default_index_path(args.input_path)
+    index = SymbolIndex.load(index_path)
+    errors = index.update(find_jack_files(args.input_path))
+    index.save(index_path)
+    for input_path, error in errors.items():
+        print(input_path + ": " + error, file=sys.stderr)
+    for query in args.query:
+        class_name, _, name = query.partition(".")
+        if name:
+            found = index.lookup_subroutine(class_name, name) or \
+                index.lookup_variable(class_name, name)
+            print(query + ": " + json.dumps(found and found._asdict()))
+        else:
+            found = index.lookup_class(class_name)
+            print(query + ": " + json.dumps(found and {
+                "path": found.path,
+                "variables": sorted(found.variables),
+                "subroutines": sorted(found.subroutines)}))
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,109 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from array import array
+
+# Token type codes, stored one byte per token in TokenBuffer.kinds.
+KEYWORD, SYMBOL, INT_CONST, STRING_CONST, IDENTIFIER = range(5)
+TOKEN_TYPE_NAMES = ("keyword", "symbol", "int_const", "string_const",
+                    "identifier")
+
+# Interned keywords and symbols. A token of one of these types stores the
+# index of its text in INTERNED in TokenBuffer.ids, so reading it never slices
+# the source, and the parser can compare it as a small int. Keywords and
+# symbols share one id space, every other token has the id NO_ID.
+KEYWORD_TABLE = ("class", "constructor", "function", "method", "field",
+                 "static", "var", "int", "char", "boolean", "void", "true",
+                 "false", "null", "this", "let", "do", "if", "else", "while",
+                 "return")
+SYMBOL_TABLE = ("{", "}", "(", ")", "[", "]", ".", ",", ";", "+", "-", "*",
+                "/", "&", "|", "<", ">", "=", "~", "^", "#")
+INTERNED = KEYWORD_TABLE + SYMBOL_TABLE
+KEYWORD_IDS = {keyword: i for i, keyword in enumerate(KEYWORD_TABLE)}
+SYMBOL_IDS = {symbol: i for i, symbol in enumerate(INTERNED)
+              if i >= len(KEYWORD_TABLE)}
+INTERNED_IDS = {text: i for i, text in enumerate(INTERNED)}
+NO_ID = 255
+
+(K_CLASS, K_CONSTRUCTOR, K_FUNCTION, K_METHOD, K_FIELD, K_STATIC, K_VAR,
+ K_INT, K_CHAR, K_BOOLEAN, K_VOID, K_TRUE, K_FALSE, K_NULL, K_THIS, K_LET,
+ K_DO, K_IF, K_ELSE, K_WHILE, K_RETURN) = range(len(KEYWORD_TABLE))
+(S_LBRACE, S_RBRACE, S_LPAREN, S_RPAREN, S_LBRACKET, S_RBRACKET, S_DOT,
+ S_COMMA, S_SEMICOLON, S_PLUS, S_MINUS, S_TIMES, S_DIVIDE, S_AND, S_OR, S_LT,
+ S_GT, S_EQ, S_NOT, S_SHIFTLEFT, S_SHIFTRIGHT) = range(len(KEYWORD_TABLE),
+                                                       len(INTERNED))
+
+
+class TokenBuffer:
+    """A columnar store of the tokens of one source.
+
+    Every token takes a type code, a start and an end offset into the source
+    and an interned id, each kept in its own array. The text of a token is
+    only read from the source when it is asked for.
+    """
+
+    __slots__ = ("source", "kinds", "starts", "ends", "ids", "_view")
+
+    def __init__(self, source: typing.Union[str, bytes]) -> None:
+        """
+        :param source: the text the offsets point into.
+        """
+        self.source = source
+        self.kinds = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.ids = array('B')
+        self._view = None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def append(self, kind: int, start: int, end: int,
+               ident: int = NO_ID) -> None:
+        """Adds a token to the end of the buffer."""
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+        self.ids.append(ident)
+
+    def slice(self, start: int, end: int) -> "TokenBuffer":
+        """
+        Returns:
+            TokenBuffer: the tokens start to end (exclusive) of this buffer,
+            over the same source.
+        """
+        part = TokenBuffer(self.source)
+        part.kinds = self.kinds[start:end]
+        part.starts = self.starts[start:end]
+        part.ends = self.ends[start:end]
+        part.ids = self.ids[start:end]
+        return part
+
+    def lexeme(self, i: int) -> str:
+        """
+        Returns:
+            str: the text of the i-th token. Keywords and symbols are returned
+            from the interned tables, anything else is sliced from the source.
+        """
+        ident = self.ids[i]
+        if ident != NO_ID:
+            return INTERNED[ident]
+        return self.source[self.starts[i]:self.ends[i]]
+
+    def view(self, i: int) -> typing.Union[str, memoryview]:
+        """
+        Returns:
+            the text of the i-th token as a memoryview of the source when the
+            source is a bytes-like object, so no copy is made, and as a str
+            slice otherwise.
+        """
+        if isinstance(self.source, str):
+            return self.source[self.starts[i]:self.ends[i]]
+        if self._view is None:
+            self._view = memoryview(self.source)
+        return self._view[self.starts[i]:self.ends[i]]
@@ -0,0 +1,121 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+from Peephole import optimize
+
+
+def format_command(command: tuple) -> str:
+    """
+    Returns:
+        str: the line of VM code of a command tuple, such as
+        ("push", "constant", 7).
+    """
+    return " ".join(map(str, command))
+
+
+class VMWriter:
+    """
+    Writes VM commands into a file. Encapsulates the VM command syntax.
+
+    Commands are kept as tuples until close(), which runs the peephole
+    optimizer over them, unless asked not to, and writes them out.
+    """
+
+    def __init__(self, output_stream: typing.TextIO,
+                 optimize: bool = True) -> None:
+        """Creates a new file and prepares it for writing VM commands.
+
+        :param output_stream: receives the VM code.
+        :param optimize: run Peephole.optimize() over the commands.
+        """
+        self.output_stream = output_stream
+        self.optimize = optimize
+        self.commands = []
+
+    def write_push(self, segment: str, index: int) -> None:
+        """Writes a VM push command.
+
+        Args:
+            segment (str): the segment to push from, can be "constant",
+            "argument", "local", "static", "this", "that", "pointer", "temp"
+            index (int): the index to push from.
+        """
+        self.commands.append(("push", segment, index))
+
+    def write_pop(self, segment: str, index: int) -> None:
+        """Writes a VM pop command.
+
+        Args:
+            segment (str): the segment to pop to, can be "argument",
+            "local", "static", "this", "that", "pointer", "temp".
+            index (int): the index to pop to.
+        """
+        self.commands.append(("pop", segment, index))
+
+    def write_arithmetic(self, command: str) -> None:
+        """Writes a VM arithmetic command.
+
+        Args:
+            command (str): the command to write, can be "add", "sub", "neg",
+            "eq", "gt", "lt", "and", "or", "not", "shiftleft", "shiftright".
+        """
+        self.commands.append((command,))
+
+    def write_label(self, label: str) -> None:
+        """Writes a VM label command.
+
+        Args:
+            label (str): the label to write.
+        """
+        self.commands.append(("label", label))
+
+    def write_goto(self, label: str) -> None:
+        """Writes a VM goto command.
+
+        Args:
+            label (str): the label to go to.
+        """
+        self.commands.append(("goto", label))
+
+    def write_if(self, label: str) -> None:
+        """Writes a VM if-goto command.
+
+        Args:
+            label (str): the label to go to.
+        """
+        self.commands.append(("if-goto", label))
+
+    def write_call(self, name: str, n_args: int) -> None:
+        """Writes a VM call command.
+
+        Args:
+            name (str): the name of the function to call.
+            n_args (int): the number of arguments the function receives.
+        """
+        self.commands.append(("call", name, n_args))
+
+    def write_function(self, name: str, n_locals: int) -> None:
+        """Writes a VM function command.
+
+        Args:
+            name (str): the name of the function.
+            n_locals (int): the number of local variables the function uses.
+        """
+        self.commands.append(("function", name, n_locals))
+
+    def write_return(self) -> None:
+        """Writes a VM return command."""
+        self.commands.append(("return",))
+
+    def close(self) -> None:
+        """Writes out the commands."""
+        commands = optimize(self.commands) if self.optimize else \
+            self.commands
+        self.output_stream.write(
+            "".join(format_command(command) + "\n" for command in commands))
+        self.commands = []
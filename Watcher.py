@@ -0,0 +1,246 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+import typing
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+# Files count as changed once they are closed after writing or moved in,
+# which is how editors save, not on every write while saving.
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF)
+EVENT_HEADER = struct.Struct("iIII")
+# Seconds without further changes before a burst of saves is handled.
+DEFAULT_DEBOUNCE = 0.1
+DEFAULT_POLL_INTERVAL = 0.5
+
+
+def _walk(root: str, is_watched: typing.Callable[[str], bool]) -> \
+        typing.Iterator[str]:
+    if not os.path.isdir(root):
+        if is_watched(root) and os.path.exists(root):
+            yield root
+        return
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            if is_watched(filename):
+                yield os.path.join(directory, filename)
+
+
+class PollingWatcher:
+    """Finds changed files by comparing the modification time and size of
+    every watched file under root on every poll.
+    """
+
+    def __init__(self, root: str, is_watched: typing.Callable[[str], bool],
+                 interval: float = DEFAULT_POLL_INTERVAL) -> None:
+        """
+        :param root: a file or a directory, which is watched recursively.
+        :param is_watched: tells whether a file name is watched.
+        :param interval: seconds between polls.
+        """
+        self.root = root
+        self.is_watched = is_watched
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self) -> typing.Dict[str, typing.Tuple[int, int]]:
+        snapshot = {}
+        for path in _walk(self.root, self.is_watched):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: typing.Optional[float] = None) -> typing.Set[
+            str]:
+        """Waits for files to change.
+
+        Args:
+            timeout (float): the longest to wait in seconds, None waits
+                until something changes.
+
+        Returns:
+            typing.Set[str]: the paths of the files that were added, changed
+            or removed, empty if timeout passed first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self.snapshot.keys()
+                       if snapshot.get(path) != self.snapshot.get(path)}
+            self.snapshot = snapshot
+            if changed or (deadline is not None and
+                           time.monotonic() >= deadline):
+                return changed
+
+    def close(self) -> None:
+        pass
+
+
+class InotifyWatcher:
+    """Finds changed files through Linux inotify, with a watch on every
+    directory under root.
+    """
+
+    def __init__(self, root: str,
+                 is_watched: typing.Callable[[str], bool]) -> None:
+        """
+        :param root: a file or a directory, which is watched recursively.
+        :param is_watched: tells whether a file name is watched.
+
+        Raises:
+            OSError: if inotify is not available.
+        """
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = (ctypes.c_int, ctypes.c_char_p,
+                                    ctypes.c_uint32)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+        self.is_watched = is_watched
+        self.root = root
+        # the only file watched, if root is a file
+        self.single_file = None
+        if not os.path.isdir(root):
+            self.single_file = os.path.abspath(root)
+            root = os.path.dirname(self.single_file)
+        # watch descriptor -> directory
+        self.directories = {}
+        self._watch_tree(root)
+
+    def _watch_tree(self, root: str) -> typing.Set[str]:
+        """Watches root and every directory under it.
+
+        Returns:
+            typing.Set[str]: the watched files found in them.
+        """
+        found = set()
+        for directory, _, filenames in os.walk(root):
+            wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                continue
+            self.directories[wd] = directory
+            found.update(os.path.join(directory, filename)
+                         for filename in filenames
+                         if self._is_watched(os.path.join(directory,
+                                                          filename)))
+            if self.single_file is not None:
+                break
+        return found
+
+    def _is_watched(self, path: str) -> bool:
+        if self.single_file is not None:
+            return os.path.abspath(path) == self.single_file
+        return self.is_watched(os.path.basename(path))
+
+    def wait(self, timeout: typing.Optional[float] = None) -> typing.Set[
+            str]:
+        """Waits for files to change, see PollingWatcher.wait()."""
+        changed = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        data = os.read(self.fd, 1 << 16)
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, pos)
+            pos += EVENT_HEADER.size
+            name = os.fsdecode(data[pos:pos + length].rstrip(b"\0"))
+            pos += length
+            if mask & IN_Q_OVERFLOW:
+                # events were lost, everything may have changed
+                changed.update(_walk(self.root, self.is_watched))
+                continue
+            if mask & IN_IGNORED:
+                self.directories.pop(wd, None)
+                continue
+            directory = self.directories.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and \
+                        self.single_file is None:
+                    changed.update(self._watch_tree(path))
+            elif self._is_watched(path):
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def make_watcher(root: str, is_watched: typing.Callable[[str], bool]):
+    """
+    Returns:
+        an InotifyWatcher of root on Linux, a PollingWatcher anywhere else
+        or if inotify cannot be used.
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, is_watched)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, is_watched)
+
+
+def watch(root: str, is_watched: typing.Callable[[str], bool],
+          on_change: typing.Callable[[typing.List[str]], None],
+          debounce: float = DEFAULT_DEBOUNCE, watcher=None) -> None:
+    """Calls on_change with the watched files under root that changed,
+    until interrupted. A burst of changes is collected until no file has
+    changed for debounce seconds and handled at once.
+
+    Args:
+        root (str): a file or a directory, which is watched recursively.
+        is_watched (typing.Callable[[str], bool]): tells whether a file name
+            is watched.
+        on_change (typing.Callable[[typing.List[str]], None]): gets the
+            changed files that still exist, sorted.
+        debounce (float): seconds of quiet that end a burst.
+        watcher: a watcher to use instead of make_watcher(root, is_watched).
+    """
+    if watcher is None:
+        watcher = make_watcher(root, is_watched)
+    try:
+        while True:
+            changed = watcher.wait()
+            while True:
+                more = watcher.wait(debounce)
+                if not more:
+                    break
+                changed |= more
+            existing = sorted(path for path in changed
+                              if os.path.exists(path))
+            if existing:
+                on_change(existing)
+    finally:
+        watcher.close()
@@ -0,0 +1,77 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import typing
+
+# Symbols that must be escaped in XML text.
+XML_ESCAPES = {"<": "&lt;", ">": "&gt;", "&": "&amp;"}
+# The number of fragments collected before they are written out in one block.
+FLUSH_FRAGMENTS = 1 << 14
+
+
+class XmlEmitter:
+    """Collects the XML of a parse into a list of fragments and writes them
+    to the output stream in large blocks, instead of one write per token.
+    The tag strings are built once per tag and nesting depth.
+    """
+
+    def __init__(self, output_stream: typing.TextIO, indent: int = 0,
+                 flush_fragments: int = FLUSH_FRAGMENTS) -> None:
+        """
+        :param output_stream: the stream the XML is written to.
+        :param indent: the number of spaces each nesting level is indented
+            by, 0 writes every tag at the start of its line.
+        :param flush_fragments: how many fragments to collect per write.
+        """
+        self.output_stream = output_stream
+        self.indent = indent
+        self.flush_fragments = flush_fragments
+        self.depth = 0
+        self._parts = []
+        self._open_tags = {}
+        self._close_tags = {}
+        self._terminal_tags = {}
+
+    def open(self, tag: str) -> None:
+        """Emits the opening tag of a non-terminal."""
+        key = (tag, self.depth)
+        text = self._open_tags.get(key)
+        if text is None:
+            text = self._open_tags[key] = \
+                " " * (self.indent * self.depth) + "<" + tag + ">\n"
+        self._parts.append(text)
+        self.depth += 1
+
+    def close(self, tag: str) -> None:
+        """Emits the closing tag of a non-terminal."""
+        self.depth -= 1
+        key = (tag, self.depth)
+        text = self._close_tags.get(key)
+        if text is None:
+            text = self._close_tags[key] = \
+                " " * (self.indent * self.depth) + "</" + tag + ">\n"
+        self._parts.append(text)
+        if len(self._parts) >= self.flush_fragments:
+            self.flush()
+
+    def terminal(self, tag: str, text: str) -> None:
+        """Emits a terminal, escaping the symbols <, > and &."""
+        if tag == "symbol":
+            text = XML_ESCAPES.get(text, text)
+        key = (tag, self.depth)
+        tags = self._terminal_tags.get(key)
+        if tags is None:
+            tags = self._terminal_tags[key] = (
+                " " * (self.indent * self.depth) + "<" + tag + "> ",
+                " </" + tag + ">\n")
+        self._parts.append(tags[0] + text + tags[1])
+
+    def flush(self) -> None:
+        """Writes all the collected fragments to the output stream."""
+        if self._parts:
+            self.output_stream.write("".join(self._parts))
+            self._parts.clear()
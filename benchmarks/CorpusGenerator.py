@@ -0,0 +1,174 @@
+"""
+This file is part of nand2tetris, as taught in The Hebrew University, and
+was written by Aviv Yaish. It is an extension to the specifications given
+[here](https://www.nand2tetris.org) (Shimon Schocken and Noam Nisan, 2017),
+as allowed by the Creative Common Attribution-NonCommercial-ShareAlike 3.0
+Unported [License](https://creativecommons.org/licenses/by-nc-sa/3.0/).
+"""
+import os
+import random
+import typing
+
+OPS = ("+", "-", "*", "/", "&", "|", "<", ">", "=")
+UNARY_OPS = ("-", "~", "^", "#")
+KEYWORD_CONSTANTS = ("true", "false", "null", "this")
+TYPES = ("int", "char", "boolean", "Array", "String")
+STRING_ALPHABET = "abcdefghijklmnopqrstuvwxyz ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+class Shape(typing.NamedTuple):
+    """The knobs of a generated class."""
+    subroutines: int = 20
+    statements: int = 20
+    expression_depth: int = 3
+    statement_depth: int = 2
+    string_length: int = 12
+    class_vars: int = 4
+
+
+# Presets stressing one part of the analyzer each.
+SHAPES = {
+    "mixed": Shape(),
+    "deep_expressions": Shape(subroutines=10, statements=10,
+                              expression_depth=9),
+    "long_statements": Shape(subroutines=4, statements=600,
+                             expression_depth=2, statement_depth=1),
+    "many_subroutines": Shape(subroutines=600, statements=3,
+                              expression_depth=2),
+    "long_strings": Shape(subroutines=10, statements=20, expression_depth=1,
+                          string_length=2000),
+}
+
+
+class CorpusGenerator:
+    """Generates valid Jack classes of a given shape. The same seed always
+    gives the same classes.
+    """
+
+    def __init__(self, seed: int = 0) -> None:
+        self.random = random.Random(seed)
+        self._variables = ["x"]
+
+    def generate_class(self, name: str, shape: Shape = Shape()) -> str:
+        """
+        Returns:
+            str: the source of a class called name.
+        """
+        lines = ["class " + name + " {"]
+        fields = ["f" + str(i) for i in range(shape.class_vars)]
+        for field in fields:
+            lines.append("    " + self.random.choice(("field", "static")) +
+                         " " + self.random.choice(TYPES) + " " + field + ";")
+        for i in range(shape.subroutines):
+            lines.extend(self._subroutine(i, fields, shape))
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def generate_corpus(self, count: int, shape: Shape = Shape(),
+                        prefix: str = "Gen") -> typing.List[
+                            typing.Tuple[str, str]]:
+        """
+        Returns:
+            the (class name, source) of count classes.
+        """
+        names = [prefix + str(i) for i in range(count)]
+        return [(name, self.generate_class(name, shape)) for name in names]
+
+    def write_corpus(self, directory: str, count: int,
+                     shape: Shape = Shape()) -> typing.List[str]:
+        """Writes count classes as .jack files into directory.
+
+        Returns:
+            typing.List[str]: the paths of the written files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, source in self.generate_corpus(count, shape):
+            path = os.path.join(directory, name + ".jack")
+            with open(path, 'w') as output_file:
+                output_file.write(source)
+            paths.append(path)
+        return paths
+
+    def _subroutine(self, index: int, fields: typing.List[str],
+                    shape: Shape) -> typing.List[str]:
+        kind = self.random.choice(("function", "method", "constructor"))
+        parameters = ["p" + str(i) for i in range(self.random.randrange(4))]
+        local_names = ["v" + str(i) for i in range(self.random.randrange(1, 4))]
+        self._variables = fields + parameters + local_names
+        return_type = "void" if kind != "constructor" else "int"
+        lines = ["    " + kind + " " + return_type + " s" + str(index) + "(" +
+                 ", ".join(self.random.choice(TYPES) + " " + parameter
+                           for parameter in parameters) + ") {"]
+        for name in local_names:
+            lines.append("        var " + self.random.choice(TYPES) + " " +
+                         name + ";")
+        for _ in range(shape.statements):
+            lines.extend(self._statement(shape, shape.statement_depth, 2))
+        lines.append("        return;")
+        lines.append("    }")
+        return lines
+
+    def _statement(self, shape: Shape, depth: int,
+                   level: int) -> typing.List[str]:
+        indent = "    " * level
+        choice = self.random.random()
+        if depth > 0 and choice < 0.15:
+            keyword = self.random.choice(("if", "while"))
+            lines = [indent + keyword + " (" + self._expression(shape) + ") {"]
+            for _ in range(self.random.randrange(1, 4)):
+                lines.extend(self._statement(shape, depth - 1, level + 1))
+            if keyword == "if" and self.random.random() < 0.5:
+                lines.append(indent + "} else {")
+                lines.extend(self._statement(shape, depth - 1, level + 1))
+            lines.append(indent + "}")
+            return lines
+        if choice < 0.35:
+            return [indent + "do " + self._call(shape, 1) + ";"]
+        target = self._variable()
+        if self.random.random() < 0.2:
+            target += "[" + self._expression(shape, 1) + "]"
+        return [indent + "let " + target + " = " +
+                self._expression(shape) + ";"]
+
+    def _expression(self, shape: Shape,
+                    depth: typing.Optional[int] = None) -> str:
+        if depth is None:
+            depth = shape.expression_depth
+        terms = [self._term(shape, depth)]
+        for _ in range(self.random.randrange(3)):
+            terms.append(self.random.choice(OPS))
+            terms.append(self._term(shape, depth))
+        return " ".join(terms)
+
+    def _term(self, shape: Shape, depth: int) -> str:
+        choice = self.random.random()
+        if depth > 1 and choice < 0.25:
+            return "(" + self._expression(shape, depth - 1) + ")"
+        if depth > 1 and choice < 0.35:
+            return self.random.choice(UNARY_OPS) + self._term(shape, depth - 1)
+        if depth > 1 and choice < 0.45:
+            return self._call(shape, depth - 1)
+        if depth > 1 and choice < 0.5:
+            return self._variable() + "[" + \
+                self._expression(shape, depth - 1) + "]"
+        if choice < 0.7:
+            return self._variable()
+        if choice < 0.85:
+            return str(self.random.randrange(32768))
+        if choice < 0.93:
+            return '"' + "".join(self.random.choice(STRING_ALPHABET) for _ in
+                                 range(shape.string_length)) + '"'
+        return self.random.choice(KEYWORD_CONSTANTS)
+
+    def _call(self, shape: Shape, depth: int) -> str:
+        arguments = ", ".join(self._expression(shape, depth) for _ in
+                              range(self.random.randrange(3)))
+        name = "s" + str(self.random.randrange(shape.subroutines))
+        if self.random.random() < 0.5:
+            name = self.random.choice(("Output", "Math", "Memory",
+                                       self._variable())) + "." + name
+        return name + "(" + arguments + ")"
+
+    def _variable(self) -> str:
+        return self.random.choice(self._variables)
@@ -0,0 +1,131 @@
+"""
+Checks that an IncrementalParser agrees with a full scan and parse after
+random edits to the synthetic corpus: its tokens always, and its tree
+whenever the edited source parses. The edits favour the characters that
+change how the text around them scans, such as comment delimiters and
+quotes.
+
+    python3 -m benchmarks.EditCheck [--edits 2000] [--seed 0]
+"""
+import argparse
+import io
+import random
+import sys
+import typing
+from IncrementalParser import IncrementalParser
+from JackAST import write_xml
+from JackAnalyzer import parse_tree
+from JackTokenizer import fill_buffer
+from benchmarks.CorpusGenerator import CorpusGenerator, Shape
+
+SNIPPETS = ("/*", "*/", "/", "*", "//", "// c\n", "\"", "{", "}", ";", " ",
+            "\n", "x", "1", "let y = 2;", "/* c */", "field int z;")
+# Sources with a comment opening or closing far from an edit.
+SOURCES = (
+    "class A {\n  function void f() {\n    let x = 1;\n    let y = 2;\n"
+    "    return;\n  }\n}\n",
+    "/** A class. */\nclass A {\n  field int x; /* a\n  field int y; */\n"
+    "  method void f() {\n    let x = 1 / 2 * 3;\n    return;\n  }\n}\n",
+)
+
+
+def tokens_of(buffer) -> typing.List[tuple]:
+    return list(zip(buffer.kinds, buffer.starts, buffer.ends, buffer.ids))
+
+
+def xml_of(tree) -> str:
+    output = io.StringIO()
+    write_xml(tree, output)
+    return output.getvalue()
+
+
+def mismatch(parser: IncrementalParser) -> typing.Optional[str]:
+    """
+    Returns:
+        what parser has wrong about its source, None if nothing.
+    """
+    source = parser.source
+    try:
+        expected = fill_buffer(source)
+    except ValueError:
+        return None if parser.buffer is None else \
+            "tokens of a source that does not scan"
+    if parser.buffer is None:
+        return "no tokens of a source that scans"
+    if tokens_of(parser.buffer) != tokens_of(expected):
+        return "tokens differ"
+    try:
+        tree = parse_tree(io.StringIO(source))
+    except ValueError:
+        return None
+    if parser.tree is None or xml_of(parser.tree) != xml_of(tree):
+        return "trees differ"
+    return None
+
+
+def random_edit(source: str,
+                generator: random.Random) -> typing.Tuple[int, int, str]:
+    """
+    Returns:
+        the offset, deleted characters and inserted text of an edit.
+    """
+    marks = [i for i, char in enumerate(source) if char in "/*\""]
+    if marks and generator.random() < 0.5:
+        # next to a comment delimiter or quote, or half of one
+        offset = min(generator.choice(marks) + generator.randint(0, 2),
+                     len(source))
+    else:
+        offset = generator.randint(0, len(source))
+    deleted = min(generator.choice((0, 0, 1, 2, 5)), len(source) - offset)
+    return offset, deleted, generator.choice(SNIPPETS)
+
+
+def check(source: str, edits: int, generator: random.Random) -> int:
+    """Makes edits random edits to source, undoing about half of them and
+    every one after which the source does not scan, so that the source
+    stays close to a valid class.
+
+    Returns:
+        int: the number of edits after which the parser was wrong.
+    """
+    failures = 0
+    parser = IncrementalParser(source)
+    for _ in range(edits):
+        offset, deleted, inserted = random_edit(parser.source, generator)
+        undo = (offset, len(inserted),
+                parser.source[offset:offset + deleted])
+        changes = [(offset, deleted, inserted), undo]
+        undoing = generator.random() < 0.5
+        for change in changes:
+            try:
+                parser.edit(*change)
+            except ValueError:
+                undoing = True
+            problem = mismatch(parser)
+            if problem is not None:
+                print("%s after edit %r:\n%s" % (problem, change,
+                                                 parser.source))
+                failures += 1
+                parser = IncrementalParser(source)
+                break
+            if not undoing:
+                break
+    return failures
+
+
+if "__main__" == __name__:
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks.EditCheck")
+    parser.add_argument("--edits", type=int, default=2000,
+                        help="edits made to every source (default: 2000)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generator = random.Random(args.seed)
+    # small enough that every edit can be checked against a full parse
+    shape = Shape(subroutines=4, statements=5, expression_depth=2)
+    sources = list(SOURCES) + [
+        source for _, source in
+        CorpusGenerator(args.seed).generate_corpus(2, shape)]
+    failures = sum(check(source, args.edits, generator)
+                   for source in sources)
+    print("%d edits, %d mismatches" % (args.edits * len(sources), failures))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,46 @@
+"""
+Checks that malformed sources are rejected with the same error, at the
+same line and column, by every engine that keeps token offsets.
+
+    python3 -m benchmarks.ErrorCheck
+"""
+import io
+import sys
+from JackAnalyzer import analyze_file
+from SourcePositions import JackSyntaxError
+
+ENGINES = ("regex", "stream")
+# (source, the error it is reported with)
+CASES = (
+    ("class A {\n}\nfoo\n", "line 3, column 1: unexpected 'foo'"),
+    ("class A {\n}\nfoo bar baz\n", "line 3, column 1: unexpected 'foo'"),
+    ("class A {\n}\n}\n", "line 3, column 1: unexpected '}'"),
+    ("foo", "line 1, column 1: unexpected 'foo'"),
+    ("class A {\n", "line 1, column 9: unexpected end of input after '{'"),
+    ("class A { /* never", "line 1, column 11: unterminated comment"),
+    ("class A {\n  function void f() {\n    /* x\n    return;\n  }\n}\n",
+     "line 3, column 5: unterminated comment"),
+    ("class A { let x = 1 }", "line 1, column 15: unexpected 'x'"),
+)
+
+
+def error_of(source: str, engine: str) -> str:
+    try:
+        analyze_file(io.StringIO(source), io.StringIO(), engine)
+    except JackSyntaxError as error:
+        error.locate(source)
+        return str(error)
+    return "no error"
+
+
+if "__main__" == __name__:
+    failures = 0
+    for source, expected in CASES:
+        for engine in ENGINES:
+            reported = error_of(source, engine)
+            if reported != expected:
+                print("%s reports %r for %r, expected %r" % (
+                    engine, reported, source, expected))
+                failures += 1
+    print("%d cases, %d wrong" % (len(CASES) * len(ENGINES), failures))
+    sys.exit(1 if failures else 0)
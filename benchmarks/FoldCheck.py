@@ -0,0 +1,47 @@
+"""
+Checks that folding constants does not change what a program does: the VM
+code of every case, peephole optimized, must be the same with and without
+ConstantFolder. The cases branch on constants, which the optimizer folds
+on its own with the semantics of the VM code.
+
+    python3 -m benchmarks.FoldCheck
+"""
+import io
+import sys
+from CodeGenerator import write_vm
+from ConstantFolder import fold_constants
+from JackAnalyzer import parse_tree
+
+CONDITIONS = ("true", "false", "0", "1", "2", "-1", "-2", "~0", "~1",
+              "1 = 1", "3 & 5", "1 | 2", "(1 + 1)", "null")
+CASES = [
+    case % condition for condition in CONDITIONS for case in (
+        "if (%s) { let x = 1; } else { let x = 2; }",
+        "if (%s) { let x = 1; }",
+        "while (%s) { let x = x + 1; }",
+    )
+]
+
+
+def vm_of(statement: str, fold: bool) -> str:
+    tree = parse_tree(io.StringIO(
+        "class A {\n  function int f() {\n    var int x;\n    let x = 0;\n"
+        "    " + statement + "\n    return x;\n  }\n}\n"))
+    if fold:
+        fold_constants(tree)
+    output = io.StringIO()
+    write_vm(tree, output)
+    return output.getvalue()
+
+
+if "__main__" == __name__:
+    failures = 0
+    for case in CASES:
+        expected = vm_of(case, False)
+        folded = vm_of(case, True)
+        if folded != expected:
+            print("folding changes " + case + ":\n" + expected +
+                  "folded:\n" + folded)
+            failures += 1
+    print("%d cases, %d changed by folding" % (len(CASES), failures))
+    sys.exit(1 if failures else 0)
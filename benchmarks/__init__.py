@@ -0,0 +1,6 @@
+"""
+Benchmarks for the Jack analyzer: a seeded generator of synthetic Jack
+classes (CorpusGenerator) and a runner measuring the throughput of the
+tokenizer, the parser and analyze_file over them (run with
+"python3 -m benchmarks" from the project directory).
+"""
@@ -0,0 +1,321 @@
+"""
+Measures the throughput of the tokenizer alone, the parser alone, the
+whole of analyze_file, of a one character edit through an
+IncrementalParser and of VM code generation over a synthetic corpus, and
+compares the numbers with a saved baseline. The VM code is also counted in
+instructions, before and after the peephole optimizer.
+
+With --memory, measures instead the memory of analyzing the corpus one
+file after another, as a batch or daemon process does: the peak bytes
+allocated per file, and the bytes still allocated once every file is done,
+per file and per 10k files, both when the output is written out and when
+the parse trees are kept.
+
+    python3 -m benchmarks [--engine regex] [--save baseline.json]
+                          [--baseline baseline.json] [--tolerance 0.1]
+    python3 -m benchmarks --memory [--classes 200]
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+import typing
+from CodeGenerator import write_vm
+from CompilationEngine import CompilationEngine
+from IncrementalParser import IncrementalParser
+from JackAnalyzer import analyze_file, parse_tree
+from JackTokenizer import ENGINES, JackTokenizer
+from Peephole import instruction_count
+from benchmarks.CorpusGenerator import SHAPES, CorpusGenerator
+
+
+class NullEmitter:
+    """Swallows the parser's output, so that only parsing is measured."""
+
+    def open(self, tag: str) -> None:
+        pass
+
+    def close(self, tag: str) -> None:
+        pass
+
+    def terminal(self, tag: str, text: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+
+def tokenize(source: str, engine: str) -> int:
+    """Tokenizes source, returning the number of tokens."""
+    tokenizer = JackTokenizer(io.StringIO(source), engine)
+    count = 1
+    while tokenizer.has_more_tokens():
+        tokenizer.advance()
+        count += 1
+    return count
+
+
+def parse(tokenizer: JackTokenizer) -> None:
+    """Parses the tokens of tokenizer without writing any output."""
+    CompilationEngine(tokenizer, None, emitter=NullEmitter())
+
+
+def analyze(source: str, engine: str) -> None:
+    """Runs analyze_file on source, writing the XML to memory."""
+    analyze_file(io.StringIO(source), io.StringIO(), engine)
+
+
+def edit(parser: IncrementalParser) -> None:
+    """Types one character into a let statement in the middle of the source
+    of parser.
+    """
+    source = parser.source
+    offset = source.find("let ", len(source) // 2)
+    if offset == -1:
+        offset = source.rfind("let ")
+    parser.edit(offset + 4, 0, "q")
+
+
+def generate(trees: typing.List, optimize: bool = True) -> int:
+    """Writes the VM code of every tree to memory.
+
+    Returns:
+        int: the number of VM instructions written.
+    """
+    count = 0
+    for tree in trees:
+        output = io.StringIO()
+        write_vm(tree, output, optimize=optimize)
+        count += instruction_count(
+            line.split() for line in output.getvalue().splitlines())
+    return count
+
+
+def best_time(function: typing.Callable[[], object], repeat: int,
+              setup: typing.Callable[[], tuple] = tuple) -> float:
+    """
+    Returns:
+        float: the fastest of repeat runs of function(*setup()), in seconds.
+        setup is not timed.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        arguments = setup()
+        start = time.perf_counter()
+        function(*arguments)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(function: typing.Callable[[], object]) -> int:
+    """
+    Returns:
+        int: the peak bytes allocated while running function.
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def memory_profile(function: typing.Callable[[str], object],
+                   sources: typing.List[str]) -> dict:
+    """Runs function on every source in turn under tracemalloc, keeping
+    what it returns.
+
+    Returns:
+        dict: "peak_bytes", the most allocated at once while one source was
+        handled over what was allocated before it, and the bytes allocated
+        at the end over those at the start, per source and per 10k sources.
+    """
+    kept = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        peak = 0
+        for source in sources:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            kept.append(function(source))
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes": peak,
+        "retained_bytes_per_file": retained / len(sources),
+        "retained_bytes_per_10k_files": retained * 10000 / len(sources),
+        "files": len(sources),
+        "bytes": sum(len(source.encode()) for source in sources),
+    }
+
+
+def run_memory(engine: str, classes: int, seed: int,
+               shapes: typing.Iterable[str]) -> dict:
+    """Measures memory_profile of every shape.
+
+    Returns:
+        dict: shape -> "xml" (analyze_file, the output discarded) or "tree"
+        (parse_tree, the trees kept) -> metrics.
+    """
+    results = {}
+    for shape_name in shapes:
+        sources = [source for _, source in CorpusGenerator(
+            seed).generate_corpus(classes, SHAPES[shape_name])]
+        results[shape_name] = {
+            "xml": memory_profile(lambda source: analyze(source, engine),
+                                  sources),
+            "tree": memory_profile(lambda source: parse_tree(
+                io.StringIO(source), engine), sources),
+        }
+    return results
+
+
+def report_memory(results: dict) -> None:
+    for shape_name, phases in results.items():
+        for phase, metrics in phases.items():
+            print("%-18s %-5s %10d peak bytes/file %12.0f retained "
+                  "bytes/file %14.0f retained bytes/10k files" % (
+                      shape_name, phase, metrics["peak_bytes"],
+                      metrics["retained_bytes_per_file"],
+                      metrics["retained_bytes_per_10k_files"]))
+
+
+def run(engine: str, classes: int, repeat: int, seed: int,
+        shapes: typing.Iterable[str]) -> dict:
+    """Benchmarks every shape.
+
+    Returns:
+        dict: shape -> phase ("tokenize", "parse", "analyze", "edit", "vm")
+        -> metrics. The "vm" phase also has "instructions" and
+        "optimized_instructions", the size of the VM code without and with
+        the peephole optimizer.
+    """
+    results = {}
+    for shape_name in shapes:
+        corpus = CorpusGenerator(seed).generate_corpus(
+            classes, SHAPES[shape_name])
+        sources = [source for _, source in corpus]
+        size = sum(len(source.encode()) for source in sources)
+        tokens = sum(tokenize(source, engine) for source in sources)
+
+        def tokenizers() -> tuple:
+            return [JackTokenizer(io.StringIO(source), engine)
+                    for source in sources],
+
+        def parsers() -> tuple:
+            return [IncrementalParser(source) for source in sources],
+
+        trees = [parse_tree(io.StringIO(source), engine)
+                 for source in sources]
+
+        phases = {
+            "tokenize": (lambda: [tokenize(source, engine)
+                                  for source in sources], tuple),
+            "parse": (lambda built: [parse(tokenizer) for tokenizer in built],
+                      tokenizers),
+            "analyze": (lambda: [analyze(source, engine)
+                                 for source in sources], tuple),
+            "edit": (lambda built: [edit(parser) for parser in built],
+                     parsers),
+            "vm": (lambda: generate(trees), tuple),
+        }
+        results[shape_name] = {}
+        for phase, (function, setup) in phases.items():
+            seconds = best_time(function, repeat, setup)
+            arguments = setup()
+            results[shape_name][phase] = {
+                "seconds": seconds,
+                "tokens_per_s": tokens / seconds,
+                "mb_per_s": size / seconds / 1e6,
+                "peak_bytes": peak_memory(lambda: function(*arguments)),
+                "tokens": tokens,
+                "bytes": size,
+            }
+        results[shape_name]["vm"].update(
+            instructions=generate(trees, optimize=False),
+            optimized_instructions=generate(trees))
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> int:
+    """Prints the throughput of every phase against the baseline.
+
+    Returns:
+        int: the number of phases slower than the baseline by more than
+        tolerance (a fraction).
+    """
+    regressions = 0
+    for shape_name, phases in results.items():
+        for phase, metrics in phases.items():
+            old = baseline.get(shape_name, {}).get(phase)
+            line = "%-18s %-9s %12.0f tokens/s %8.2f MB/s %10d peak bytes" % (
+                shape_name, phase, metrics["tokens_per_s"],
+                metrics["mb_per_s"], metrics["peak_bytes"])
+            if "instructions" in metrics:
+                line += "  %d -> %d VM instructions" % (
+                    metrics["instructions"], metrics["optimized_instructions"])
+            if old is not None:
+                ratio = metrics["tokens_per_s"] / old["tokens_per_s"]
+                line += "  %+6.1f%%" % ((ratio - 1) * 100)
+                if ratio < 1 - tolerance:
+                    line += "  REGRESSION"
+                    regressions += 1
+            print(line)
+    return regressions
+
+
+if "__main__" == __name__:
+    parser = argparse.ArgumentParser(prog="python3 -m benchmarks")
+    parser.add_argument("--engine", choices=ENGINES, default="regex")
+    parser.add_argument("--classes", type=int, default=5,
+                        help="classes generated per shape (default: 5)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="timed runs per phase, the best is kept")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--shapes", nargs="+", choices=sorted(SHAPES),
+                        default=sorted(SHAPES))
+    parser.add_argument("--baseline",
+                        help="JSON results of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="slowdown counted as a regression (default: 0.1)")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--memory", action="store_true",
+                        help="measure the peak and retained memory per file "
+                             "instead of the throughput")
+    parser.add_argument("--write-corpus", metavar="DIRECTORY",
+                        help="only write the corpus as .jack files")
+    args = parser.parse_args()
+    if args.write_corpus:
+        for shape_name in args.shapes:
+            CorpusGenerator(args.seed).write_corpus(
+                os.path.join(args.write_corpus, shape_name), args.classes,
+                SHAPES[shape_name])
+        sys.exit(0)
+    if args.memory:
+        results = run_memory(args.engine, args.classes, args.seed,
+                             args.shapes)
+        report_memory(results)
+        if args.save:
+            with open(args.save, 'w') as results_file:
+                json.dump(results, results_file, indent=2, sort_keys=True)
+        sys.exit(0)
+    results = run(args.engine, args.classes, args.repeat, args.seed,
+                  args.shapes)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    regressions = compare(results, baseline, args.tolerance)
+    if args.save:
+        with open(args.save, 'w') as results_file:
+            json.dump(results, results_file, indent=2, sort_keys=True)
+    sys.exit(1 if regressions else 0)